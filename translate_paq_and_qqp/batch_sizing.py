@@ -0,0 +1,44 @@
+"""Adaptive batch size for ``MasterCoordinator`` (``--target-batch-seconds``).
+
+A fixed ``--batch-size`` is a poor fit when row lengths vary: a batch of
+long rows can take ten times as long as one of short rows, so some batches
+hold a worker far longer than the target while others cost more in IPC
+than in translation. :class:`AdaptiveBatchSize` keeps a moving average of
+the seconds per row reported by the workers and sizes the next batch so it
+should take about *target_seconds*, within ``[min_size, max_size]``.
+
+It is a callable returning the current size, so it can be passed to
+:func:`dataset_source.iter_batches` instead of an ``int``.
+"""
+
+from __future__ import annotations
+
+
+class AdaptiveBatchSize:
+	"""Batch size steered toward *target_seconds* of worker time per batch."""
+
+	def __init__(self, initial: int, target_seconds: float, min_size: int = 1,
+				 max_size: int = 0, smoothing: float = 0.3):
+		if target_seconds <= 0:
+			raise ValueError("target_seconds must be > 0.")
+		self.min_size = max(1, min_size)
+		self.max_size = max_size if max_size > 0 else 8 * max(1, initial)
+		self.target_seconds = target_seconds
+		self.smoothing = smoothing
+		self.size = min(self.max_size, max(self.min_size, initial))
+		self._seconds_per_row = None
+
+	def __call__(self) -> int:
+		return self.size
+
+	def observe(self, rows: int, seconds: float) -> None:
+		"""Feed back one finished batch of *rows* that took *seconds*."""
+		if rows <= 0 or seconds <= 0:
+			return
+		sample = seconds / rows
+		if self._seconds_per_row is None:
+			self._seconds_per_row = sample
+		else:
+			self._seconds_per_row += self.smoothing * (sample - self._seconds_per_row)
+		wanted = round(self.target_seconds / self._seconds_per_row)
+		self.size = min(self.max_size, max(self.min_size, wanted))
@@ -0,0 +1,110 @@
+"""Compare translation throughput (sentences/sec) of several engines.
+
+Every engine translates exactly the same inputs in chunks of
+``--engine-batch-size``; the translation cache is always disabled so each
+engine does the full work. Example (CPU box)::
+
+	python benchmark_engines.py --engines transformers ct2 --device cpu --num-sentences 512
+
+Results are printed as JSON (and written to ``--output-json`` if given).
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from translate_qqp import configure_cache
+from translation_engine import make_engine, engine_config_from_args, add_engine_args
+
+
+# Short QQP/PAQ-like inputs used when no --input file is given.
+SAMPLE_SENTENCES = [
+	"How do I improve my English speaking skills?",
+	"What is the best way to learn programming on my own?",
+	"Who wrote the novel One Hundred Years of Solitude?",
+	"Why is the sky blue during the day and red at sunset?",
+	"What are the health benefits of drinking green tea every morning?",
+	"1998",
+	"the United States Congress",
+	"Which country has the largest population in the world, and why has it grown so quickly over the last century?",
+	"Is it possible to make money online without any investment?",
+	"Gabriel García Márquez",
+]
+
+
+def load_sentences(path: str, n: int) -> List[str]:
+	if path:
+		lines = [ln.strip() for ln in Path(path).read_text(encoding="utf-8").splitlines()]
+		pool = [ln for ln in lines if ln]
+	else:
+		pool = SAMPLE_SENTENCES
+	if not pool:
+		raise ValueError(f"No sentences found in {path}")
+	return [pool[i % len(pool)] for i in range(n)]
+
+
+def bench_engine(engine_config: Dict[str, Any], sentences: List[str], warmup: int) -> Dict[str, Any]:
+	t0 = time.perf_counter()
+	engine = make_engine(**engine_config)
+	load_seconds = time.perf_counter() - t0
+
+	chunk = max(1, engine.batch_size)
+	if warmup:
+		engine.translate(sentences[:min(warmup, len(sentences))])
+
+	t0 = time.perf_counter()
+	for start in range(0, len(sentences), chunk):
+		engine.translate(sentences[start:start + chunk])
+	seconds = time.perf_counter() - t0
+
+	return {
+		"engine": engine_config["engine"],
+		"load_seconds": round(load_seconds, 3),
+		"sentences": len(sentences),
+		"seconds": round(seconds, 3),
+		"sentences_per_sec": round(len(sentences) / seconds, 2) if seconds > 0 else None,
+		"stats": engine.stats(),
+	}
+
+
+def build_arg_parser():
+	p = argparse.ArgumentParser(description="Benchmark translation engines on identical inputs.")
+	p.add_argument('--engines', nargs='+', default=['transformers', 'ct2'],
+				   help='Engines to compare, in order (default: transformers ct2)')
+	p.add_argument('--input', default='', help='Text file with one sentence per line (default: built-in samples)')
+	p.add_argument('--num-sentences', type=int, default=256, help='Sentences to translate per engine (default: 256)')
+	p.add_argument('--warmup', type=int, default=8, help='Sentences translated before timing starts (default: 8)')
+	p.add_argument('--output-json', default='', help='Also write the results to this JSON file')
+	add_engine_args(p)
+	return p
+
+
+def main():
+	parser = build_arg_parser()
+	args = parser.parse_args()
+	configure_cache(Path.cwd())
+
+	sentences = load_sentences(args.input, args.num_sentences)
+	results = []
+	for name in args.engines:
+		engine_config = engine_config_from_args(args)
+		engine_config["engine"] = name
+		engine_config["cache_path"] = None
+		print(f"Benchmarking {name} on {len(sentences)} sentences...")
+		results.append(bench_engine(engine_config, sentences, args.warmup))
+
+	baseline = results[0]["sentences_per_sec"] if results else None
+	for r in results:
+		if baseline and r["sentences_per_sec"]:
+			r["speedup_vs_first"] = round(r["sentences_per_sec"] / baseline, 2)
+
+	report = json.dumps(results, indent=2, ensure_ascii=False)
+	print(report)
+	if args.output_json:
+		Path(args.output_json).write_text(report + "\n", encoding="utf-8")
+
+
+if __name__ == '__main__':
+	main()
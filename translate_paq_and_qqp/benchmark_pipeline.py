@@ -0,0 +1,250 @@
+"""Throughput benchmark for the QQP/PAQ translation pipelines.
+
+Generates local QQP-triplet / PAQ-pair datasets of a configurable size and
+string-length distribution, then runs ``translate_triplets_single`` /
+``translate_pairs_single`` (``--workers 1``) or ``MasterCoordinator``
+(``--workers > 1``) for every combination of workers x batch size x flush
+settings x output format x ``--target-batch-seconds`` x ``--global-dedup``.
+The engine defaults to ``--engine stub`` (no model, no network), so
+the numbers measure the pipeline itself; any other ``--engine`` works too.
+With ``--distinct-strings N`` the generated strings are drawn from N
+sentences with Zipf-like frequencies, like the repeated questions of QQP
+and answers of PAQ, instead of all being different.
+Example::
+
+	python benchmark_pipeline.py --rows 5000 --workers 1 2 4 --batch-sizes 20 100 \\
+		--stub-token-latency-ms 0.5 --output-json pipeline_bench.json
+
+Each configuration runs in a fresh process. Per configuration it reports
+rows/sec, p50/p99 batch latency, peak RSS (master and largest worker) and the
+time spent flushing the output (the final XLSX export is skipped), as JSON.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import queue
+import random
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+from output_sink import OUTPUT_FORMATS
+from translation_engine import engine_config_from_args, add_engine_args
+
+
+# Vocabulary for the generated strings (content does not matter to the stub).
+WORDS = (
+	"what how why who which where is are the a of to in and for on with best way "
+	"learn make money online english language question answer world country year "
+	"people time good new first last long great little own other old right big high"
+).split()
+
+
+def _sentence(rng: random.Random, median_words: float, sigma: float, max_words: int) -> str:
+	# Log-normal word counts: most strings are short, a few are very long.
+	n = int(round(rng.lognormvariate(math.log(median_words), sigma)))
+	n = max(1, min(max_words, n))
+	return " ".join(rng.choice(WORDS) for _ in range(n)) + "?"
+
+
+def _sentence_source(rng: random.Random, median_words: float, sigma: float, max_words: int,
+					 distinct: int):
+	"""Sentence generator; with *distinct* > 0, draws from that many sentences."""
+	if distinct <= 0:
+		return lambda: _sentence(rng, median_words, sigma, max_words)
+	pool = [_sentence(rng, median_words, sigma, max_words) for _ in range(distinct)]
+	# Zipf-like: the k-th sentence is drawn with weight 1 / (k + 1).
+	cum_weights = list(itertools.accumulate(1.0 / (k + 1) for k in range(distinct)))
+	return lambda: rng.choices(pool, cum_weights=cum_weights)[0]
+
+
+def write_dataset(pipeline: str, path: Path, rows: int, median_words: float,
+				  sigma: float, max_words: int, max_negs: int, seed: int,
+				  distinct: int = 0) -> None:
+	"""Write a ``.jsonl`` dataset with the same columns as the Hub datasets."""
+	rng = random.Random(seed)
+	sentence = _sentence_source(rng, median_words, sigma, max_words, distinct)
+	# PAQ answers are short entities / phrases.
+	answer = _sentence_source(rng, max(1.0, median_words / 4), sigma, max_words, distinct)
+	with open(path, "w", encoding="utf-8") as fh:
+		for _ in range(rows):
+			if pipeline == "qqp":
+				record = {"set": {
+					"query": sentence(),
+					"pos": [sentence()],
+					"neg": [sentence() for _ in range(rng.randint(0, max_negs))],
+				}}
+			else:
+				record = {"set": [sentence(), answer()]}
+			fh.write(json.dumps(record) + "\n")
+
+
+def _run_config(config: Dict[str, Any], out_queue) -> None:
+	"""Run one configuration (in a fresh spawned process) and report back."""
+	from proc_stats import peak_children_rss_mb, peak_rss_mb
+
+	try:
+		os.chdir(config["work_dir"])
+		common = dict(
+			skip_rows=0,
+			max_rows=None,
+			output_excel="out.xlsx",
+			log_file="log.txt",
+			engine_config=config["engine_config"],
+			flush_every=config["flush_every"],
+			flush_interval_seconds=config["flush_interval_seconds"],
+			dataset_name=config["dataset"],
+			output_format=config["output_format"],
+			xlsx_export=False,
+			global_dedup=config["global_dedup"],
+		)
+		if config["pipeline"] == "qqp":
+			import translate_qqp as module
+			single = module.translate_triplets_single
+		else:
+			import translate_paq as module
+			single = module.translate_pairs_single
+
+		if config["workers"] == 1:
+			stats = single(batch_size=config["batch_size"], **common)
+		else:
+			stats = module.MasterCoordinator(
+				num_workers=config["workers"], batch_size=config["batch_size"],
+				target_batch_seconds=config["target_batch_seconds"], **common
+			).run()
+		result = stats.summary()
+		worker_peak = peak_children_rss_mb() if config["workers"] > 1 else None
+		master_peak = peak_rss_mb()
+		result["peak_rss_mb"] = round(master_peak, 1) if master_peak is not None else None
+		result["peak_worker_rss_mb"] = round(worker_peak, 1) if worker_peak is not None else None
+		out_queue.put(result)
+	except BaseException as exc:  # noqa: BLE001 - report any failure to the parent
+		out_queue.put({"error": repr(exc)})
+		raise
+
+
+def bench_config(config: Dict[str, Any]) -> Dict[str, Any]:
+	ctx = mp.get_context("spawn")
+	out_queue = ctx.Queue()
+	p = ctx.Process(target=_run_config, args=(config, out_queue), name="bench-config")
+	p.start()
+	result = None
+	while result is None:
+		try:
+			result = out_queue.get(timeout=1.0)
+		except queue.Empty:
+			if p.is_alive():
+				continue
+			# Killed before reporting (OOM killer, SIGKILL): record the
+			# failure instead of waiting forever. A result put just before
+			# exiting may still be in the pipe.
+			try:
+				result = out_queue.get(timeout=1.0)
+			except queue.Empty:
+				result = {"error": f"config process exited with code {p.exitcode} without a result"}
+				print(f"  {result['error']}")
+	p.join()
+	report = {k: config[k] for k in (
+		"pipeline", "workers", "batch_size", "flush_every", "flush_interval_seconds",
+		"output_format", "target_batch_seconds", "global_dedup",
+	)}
+	report["mode"] = "single" if config["workers"] == 1 else "coordinator"
+	report.update(result)
+	return report
+
+
+def build_arg_parser():
+	p = argparse.ArgumentParser(description="Benchmark the QQP/PAQ translation pipelines.")
+	p.add_argument('--pipelines', nargs='+', choices=['qqp', 'paq'], default=['qqp', 'paq'],
+				   help='Pipelines to benchmark (default: qqp paq)')
+	p.add_argument('--rows', type=int, default=2000, help='Rows in each generated dataset (default: 2000)')
+	p.add_argument('--median-words', type=float, default=12.0,
+				   help='Median words per generated string (default: 12)')
+	p.add_argument('--length-sigma', type=float, default=0.6,
+				   help='Spread of the log-normal string length distribution; 0 = fixed length (default: 0.6)')
+	p.add_argument('--max-words', type=int, default=200, help='Longest generated string in words (default: 200)')
+	p.add_argument('--max-negs', type=int, default=3, help='Most QQP negatives per row (default: 3)')
+	p.add_argument('--distinct-strings', type=int, default=0,
+				   help='Draw the generated strings from this many sentences with Zipf-like '
+				   'frequencies; 0 = every string is different (default: 0)')
+	p.add_argument('--seed', type=int, default=0, help='Seed for the generated datasets (default: 0)')
+	p.add_argument('--workers', type=int, nargs='+', default=[1, 2],
+				   help='Worker counts to try; 1 = single-process mode (default: 1 2)')
+	p.add_argument('--batch-sizes', type=int, nargs='+', default=[20],
+				   help='Rows per batch to try (default: 20)')
+	p.add_argument('--flush-every', type=int, nargs='+', default=[5],
+				   help='--flush-every values to try (default: 5)')
+	p.add_argument('--flush-interval-seconds', type=float, nargs='+', default=[5.0],
+				   help='--flush-interval-seconds values to try (default: 5.0)')
+	p.add_argument('--output-formats', nargs='+', choices=OUTPUT_FORMATS, default=['jsonl'],
+				   help='Output formats to try (default: jsonl)')
+	p.add_argument('--target-batch-seconds', type=float, nargs='+', default=[0.0],
+				   help='--target-batch-seconds values to try with --workers > 1; 0 = fixed batch size (default: 0)')
+	p.add_argument('--global-dedup', nargs='+', choices=['off', 'on'], default=['off'],
+				   help='--global-dedup settings to try (default: off)')
+	p.add_argument('--output-json', default='', help='Also write the results to this JSON file')
+	add_engine_args(p)
+	p.set_defaults(engine='stub')
+	return p
+
+
+def main():
+	parser = build_arg_parser()
+	args = parser.parse_args()
+	if min(args.workers) < 1 or min(args.batch_sizes) < 1 or args.rows < 1:
+		parser.error("--rows, --workers and --batch-sizes must be >= 1")
+
+	engine_config = engine_config_from_args(args)
+	engine_config["cache_path"] = None
+
+	results: List[Dict[str, Any]] = []
+	with tempfile.TemporaryDirectory(prefix="pipeline-bench-") as tmp:
+		tmp_dir = Path(tmp)
+		datasets = {}
+		for pipeline in args.pipelines:
+			datasets[pipeline] = tmp_dir / f"{pipeline}.jsonl"
+			write_dataset(pipeline, datasets[pipeline], args.rows, args.median_words,
+						  args.length_sigma, args.max_words, args.max_negs, args.seed,
+						  args.distinct_strings)
+
+		grid = itertools.product(
+			args.pipelines, args.workers, args.batch_sizes,
+			args.flush_every, args.flush_interval_seconds, args.output_formats,
+			args.target_batch_seconds, args.global_dedup,
+		)
+		for n, (pipeline, workers, batch_size, flush_every, flush_interval, output_format,
+				target_seconds, global_dedup) in enumerate(grid):
+			if workers == 1 and target_seconds > 0:
+				continue  # single-process mode uses a fixed batch size
+			work_dir = tmp_dir / f"run{n}"
+			work_dir.mkdir()
+			config = {
+				"pipeline": pipeline,
+				"dataset": str(datasets[pipeline]),
+				"work_dir": str(work_dir),
+				"engine_config": engine_config,
+				"workers": workers,
+				"batch_size": batch_size,
+				"flush_every": flush_every,
+				"flush_interval_seconds": flush_interval,
+				"output_format": output_format,
+				"target_batch_seconds": target_seconds,
+				"global_dedup": global_dedup == "on",
+			}
+			print(f"Benchmarking {pipeline}: workers={workers} batch_size={batch_size} "
+				  f"flush_every={flush_every} flush_interval={flush_interval}s output={output_format} "
+				  f"target_batch_seconds={target_seconds} global_dedup={global_dedup} ...")
+			results.append(bench_config(config))
+
+	report = json.dumps(results, indent=2)
+	print(report)
+	if args.output_json:
+		Path(args.output_json).write_text(report + "\n", encoding="utf-8")
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,123 @@
+"""CPU thread partitioning and core pinning for ``MasterCoordinator`` workers.
+
+By default every spawned worker lets torch (or CTranslate2) use all cores, so
+N workers on a CPU box run N x cores threads and throughput drops as workers
+are added. :func:`plan_cpu_layout` splits the cores the master may run on
+into one :class:`CpuLayout` per worker, and :func:`apply_cpu_layout` applies
+it inside the worker before the engine is created:
+
+* ``OMP_NUM_THREADS`` / ``MKL_NUM_THREADS`` (read by CTranslate2 and by torch
+  when it is first imported);
+* ``torch.set_num_threads`` / ``torch.set_num_interop_threads``;
+* optionally ``os.sched_setaffinity`` to a disjoint core set per worker.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from typing import List, Optional, Sequence, Union
+
+
+def available_cores() -> List[int]:
+	"""Cores this process may run on (respects taskset / cgroup cpusets)."""
+	if hasattr(os, "sched_getaffinity"):
+		return sorted(os.sched_getaffinity(0))
+	return list(range(os.cpu_count() or 1))
+
+
+def parse_threads_per_worker(value: str) -> Union[int, str]:
+	"""argparse ``type`` for ``--threads-per-worker``: a positive int or ``auto``."""
+	if value == "auto":
+		return value
+	try:
+		threads = int(value)
+	except ValueError:
+		threads = 0
+	if threads < 1:
+		raise argparse.ArgumentTypeError(
+			f"invalid value '{value}' (use a positive integer or 'auto')"
+		)
+	return threads
+
+
+class CpuLayout:
+	"""Threads (and optionally cores) assigned to one worker."""
+
+	def __init__(self, worker_id: int, threads: int, interop_threads: int = 1,
+				 cores: Optional[Sequence[int]] = None):
+		self.worker_id = worker_id
+		self.threads = threads
+		self.interop_threads = interop_threads
+		self.cores = list(cores) if cores else None
+
+	def describe(self) -> str:
+		pinned = f"cores {_format_cores(self.cores)}" if self.cores else "unpinned"
+		return (f"worker {self.worker_id}: {self.threads} threads "
+				f"(interop {self.interop_threads}), {pinned}")
+
+
+def _format_cores(cores: Sequence[int]) -> str:
+	"""[0, 1, 2, 5] -> '0-2,5'."""
+	parts: List[str] = []
+	start = prev = cores[0]
+	for core in list(cores[1:]) + [None]:
+		if core is not None and core == prev + 1:
+			prev = core
+			continue
+		parts.append(str(start) if start == prev else f"{start}-{prev}")
+		if core is not None:
+			start = prev = core
+	return ",".join(parts)
+
+
+def plan_cpu_layout(
+	num_workers: int,
+	threads_per_worker: Union[int, str],
+	pin: bool = False,
+	cores: Optional[Sequence[int]] = None,
+) -> List[CpuLayout]:
+	"""One :class:`CpuLayout` per worker.
+
+	``threads_per_worker="auto"`` divides the available cores evenly (at least
+	one thread each). With *pin*, worker ``i`` gets the ``i``-th disjoint slice
+	of *cores*; this requires ``num_workers x threads <= len(cores)``.
+	"""
+	cores = list(cores) if cores is not None else available_cores()
+	if threads_per_worker == "auto":
+		threads = max(1, len(cores) // num_workers)
+	else:
+		threads = int(threads_per_worker)
+	if pin and num_workers * threads > len(cores):
+		raise ValueError(
+			f"--pin-workers needs workers x threads-per-worker ({num_workers} x {threads}) "
+			f"<= available cores ({len(cores)})."
+		)
+	return [
+		CpuLayout(
+			worker_id=wid,
+			threads=threads,
+			cores=cores[wid * threads:(wid + 1) * threads] if pin else None,
+		)
+		for wid in range(num_workers)
+	]
+
+
+def apply_cpu_layout(layout: CpuLayout, uses_torch: bool = True) -> None:
+	"""Apply *layout* to the current process (call before creating the engine)."""
+	os.environ["OMP_NUM_THREADS"] = str(layout.threads)
+	os.environ["MKL_NUM_THREADS"] = str(layout.threads)
+	if layout.cores and hasattr(os, "sched_setaffinity"):
+		os.sched_setaffinity(0, layout.cores)
+	if not uses_torch:
+		return
+	try:
+		import torch
+	except ImportError:
+		return
+	torch.set_num_threads(layout.threads)
+	try:
+		torch.set_num_interop_threads(layout.interop_threads)
+	except RuntimeError:
+		# Only allowed before torch starts any inter-op parallel work.
+		pass
@@ -0,0 +1,138 @@
+"""Source dataset loading shared by ``translate_qqp.py`` and ``translate_paq.py``.
+
+``--dataset`` is either a HuggingFace Hub dataset name (the default) or a
+local ``.jsonl`` / ``.json`` / ``.parquet`` file with the same (nested)
+columns, so the scripts can run without network access, e.g.::
+
+	python -c "from datasets import load_dataset; \
+load_dataset('embedding-data/QQP_triplets', split='train').to_json('qqp.jsonl')"
+	python translate_qqp.py --dataset qqp.jsonl --engine stub
+
+:func:`select_rows` restricts the dataset to the ``--skip-rows`` /
+``--max-rows`` range without reading the skipped rows (Arrow slicing for
+map-style datasets, ``IterableDataset.skip`` when streaming), so resuming
+deep into a dataset costs the same as starting at row 0.
+
+:func:`iter_batches` turns the selected row range into batches lazily, so the
+``MasterCoordinator`` can start dispatching immediately and memory does not
+grow with the dataset size. With ``--streaming`` the dataset itself is read
+as an ``IterableDataset`` and nothing is downloaded up front;
+:func:`prefetch` then reads ahead on a background thread so network stalls
+do not hold up the master's result loop.
+"""
+
+from __future__ import annotations
+
+import itertools
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, TypeVar, Union
+
+from datasets import Dataset, IterableDataset, load_dataset
+
+
+T = TypeVar("T")
+
+
+# File suffix -> ``datasets`` builder name.
+LOCAL_FORMATS = {
+	".jsonl": "json",
+	".json": "json",
+	".parquet": "parquet",
+}
+
+
+def load_source_dataset(name: str, streaming: bool = False):
+	"""Load the ``train`` split of Hub dataset *name* or of local file *name*."""
+	path = Path(name)
+	builder = LOCAL_FORMATS.get(path.suffix.lower())
+	if builder is not None and path.is_file():
+		return load_dataset(builder, data_files=str(path), streaming=streaming, split="train")
+	return load_dataset(name, streaming=streaming, split="train")
+
+
+def select_rows(dataset: Any, skip_rows: int, max_rows: Optional[int]) -> Any:
+	"""Rows ``[skip_rows, skip_rows + max_rows)`` of *dataset*, without scanning.
+
+	A map-style ``Dataset`` is sliced with a contiguous ``select`` (no indices
+	mapping is built); an ``IterableDataset`` uses ``skip`` / ``take``. Any
+	other iterable falls back to :func:`itertools.islice`. Row ``k`` of the
+	result is row ``skip_rows + k`` of *dataset*.
+	"""
+	skip_rows = max(0, skip_rows)
+	if isinstance(dataset, Dataset):
+		start = min(skip_rows, len(dataset))
+		end = len(dataset) if max_rows is None else min(len(dataset), start + max_rows)
+		if start >= end:
+			# select() rejects an empty range that starts past the last row.
+			return dataset.select([])
+		return dataset.select(range(start, end))
+	if isinstance(dataset, IterableDataset):
+		if skip_rows:
+			dataset = dataset.skip(skip_rows)
+		return dataset.take(max_rows) if max_rows is not None else dataset
+	stop = None if max_rows is None else skip_rows + max_rows
+	return itertools.islice(dataset, skip_rows, stop)
+
+
+def expected_rows(rows: Any) -> Optional[int]:
+	"""Number of rows in *rows* (from :func:`select_rows`), or None if unknown."""
+	try:
+		return len(rows)
+	except TypeError:
+		return None
+
+
+def iter_batches(
+	rows: Iterable[Any],
+	to_row: Callable[[int, Any], T],
+	batch_size: Union[int, Callable[[], int]],
+	start_index: int = 0,
+) -> Iterator[List[T]]:
+	"""Yield lists of ``to_row(index, record)`` of at most *batch_size* rows.
+
+	*start_index* is the dataset index of the first record in *rows*.
+	*batch_size* may be a callable (e.g. ``batch_sizing.AdaptiveBatchSize``);
+	it is then asked for the size of each batch as that batch is started.
+	"""
+	size_of = batch_size if callable(batch_size) else (lambda: batch_size)
+	batch: List[T] = []
+	limit = size_of()
+	for i, data in enumerate(rows, start=start_index):
+		batch.append(to_row(i, data))
+		if len(batch) >= limit:
+			yield batch
+			batch = []
+			limit = size_of()
+	if batch:
+		yield batch
+
+
+_DONE = object()
+
+
+def prefetch(items: Iterable[T], depth: int = 8) -> Iterator[T]:
+	"""Iterate *items* on a daemon thread, keeping up to *depth* ready.
+
+	Exceptions raised by the underlying iterator are re-raised in the caller.
+	"""
+	buffer: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, depth))
+
+	def produce() -> None:
+		try:
+			for item in items:
+				buffer.put(item)
+		except BaseException as exc:  # noqa: BLE001 - handed to the consumer
+			buffer.put(exc)
+			return
+		buffer.put(_DONE)
+
+	threading.Thread(target=produce, name="batch-prefetch", daemon=True).start()
+	while True:
+		item = buffer.get()
+		if item is _DONE:
+			return
+		if isinstance(item, BaseException):
+			raise item
+		yield item
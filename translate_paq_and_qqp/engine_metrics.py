@@ -0,0 +1,207 @@
+"""Optional metrics surface for translation engines.
+
+:class:`EngineMetrics` holds plain counters and fixed-bucket histograms. When
+``make_engine(metrics=True)`` is used, every engine layer shares one
+instance:
+
+* :class:`MeteredEngine` (wrapped directly around the backend) records the
+  per-call latency histogram, batch sizes and call/text counters;
+* the backends add what only they know - input/output token counts, padding
+  for ``transformers``, HTTP latency for ``ollama``, retries and dead letters;
+* :class:`~translation_cache.CachedEngine` adds cache hits/misses.
+
+Snapshots are plain dicts, so ``MasterCoordinator`` workers can send them to
+the master, which merges them and writes the result as JSON or Prometheus
+text (see :func:`write_metrics`).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from translation_engine import TranslationEngine
+
+
+LATENCY_BUCKETS: Sequence[float] = (
+	0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+SIZE_BUCKETS: Sequence[float] = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+
+class Histogram:
+	"""Cumulative-bucket histogram (Prometheus semantics)."""
+
+	def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+		self.buckets = list(buckets)
+		self.counts = [0] * len(self.buckets)
+		self.count = 0
+		self.sum = 0.0
+
+	def observe(self, value: float) -> None:
+		self.count += 1
+		self.sum += value
+		for i, upper in enumerate(self.buckets):
+			if value <= upper:
+				self.counts[i] += 1
+
+	def quantile(self, q: float) -> Optional[float]:
+		"""Upper bound of the bucket holding the *q* quantile (None if empty)."""
+		if self.count == 0:
+			return None
+		target = q * self.count
+		for upper, cumulative in zip(self.buckets, self.counts):
+			if cumulative >= target:
+				return upper
+		return float("inf")
+
+	def snapshot(self) -> Dict[str, Any]:
+		return {"buckets": self.buckets, "counts": self.counts, "count": self.count, "sum": self.sum}
+
+	@classmethod
+	def from_snapshot(cls, snap: Dict[str, Any]) -> "Histogram":
+		h = cls(snap["buckets"])
+		h.counts = list(snap["counts"])
+		h.count = snap["count"]
+		h.sum = snap["sum"]
+		return h
+
+	def merge(self, other: "Histogram") -> None:
+		if other.buckets != self.buckets:
+			raise ValueError("Cannot merge histograms with different buckets")
+		self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+		self.count += other.count
+		self.sum += other.sum
+
+
+class EngineMetrics:
+	"""Named counters and histograms shared by the layers of one engine.
+
+	Updates take a lock: ``RoutingEngine`` runs its sub-engines in threads
+	that all record into the same instance.
+	"""
+
+	def __init__(self):
+		self.counters: Dict[str, float] = {}
+		self.histograms: Dict[str, Histogram] = {}
+		self._lock = threading.Lock()
+
+	def inc(self, name: str, value: float = 1) -> None:
+		with self._lock:
+			self.counters[name] = self.counters.get(name, 0) + value
+
+	def observe(self, name: str, value: float, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+		with self._lock:
+			hist = self.histograms.get(name)
+			if hist is None:
+				hist = self.histograms[name] = Histogram(buckets)
+			hist.observe(value)
+
+	def snapshot(self) -> Dict[str, Any]:
+		with self._lock:
+			return {
+				"counters": dict(self.counters),
+				"histograms": {k: h.snapshot() for k, h in self.histograms.items()},
+			}
+
+	@classmethod
+	def merged(cls, snapshots: Iterable[Dict[str, Any]]) -> "EngineMetrics":
+		"""Sum several snapshots (e.g. the latest one from every worker)."""
+		out = cls()
+		for snap in snapshots:
+			for name, value in snap.get("counters", {}).items():
+				out.inc(name, value)
+			for name, hsnap in snap.get("histograms", {}).items():
+				hist = Histogram.from_snapshot(hsnap)
+				if name in out.histograms:
+					out.histograms[name].merge(hist)
+				else:
+					out.histograms[name] = hist
+		return out
+
+	def derived(self) -> Dict[str, Optional[float]]:
+		"""Ratios computed from the raw counters."""
+		c = self.counters
+		call_seconds = self.histograms.get("engine_call_seconds")
+		busy = call_seconds.sum if call_seconds else 0.0
+		tokens = c.get("input_tokens_total", 0) + c.get("output_tokens_total", 0)
+		padded = c.get("padded_tokens_total", 0)
+		return {
+			"tokens_per_sec": (tokens / busy) if busy > 0 else None,
+			"texts_per_sec": (c.get("engine_texts_total", 0) / busy) if busy > 0 else None,
+			"padding_ratio": (1.0 - c.get("real_tokens_total", 0) / padded) if padded else None,
+			"engine_call_seconds_p50": call_seconds.quantile(0.5) if call_seconds else None,
+			"engine_call_seconds_p99": call_seconds.quantile(0.99) if call_seconds else None,
+		}
+
+	def to_json(self) -> str:
+		data = self.snapshot()
+		data["derived"] = self.derived()
+		data["time"] = time.time()
+		return json.dumps(data, indent=2)
+
+	def to_prometheus(self, prefix: str = "translate_") -> str:
+		lines: List[str] = []
+		for name in sorted(self.counters):
+			metric = prefix + name
+			lines.append(f"# TYPE {metric} counter")
+			lines.append(f"{metric} {self.counters[name]}")
+		for name in sorted(self.histograms):
+			hist = self.histograms[name]
+			metric = prefix + name
+			lines.append(f"# TYPE {metric} histogram")
+			for upper, cumulative in zip(hist.buckets, hist.counts):
+				lines.append(f'{metric}_bucket{{le="{upper}"}} {cumulative}')
+			lines.append(f'{metric}_bucket{{le="+Inf"}} {hist.count}')
+			lines.append(f"{metric}_sum {hist.sum}")
+			lines.append(f"{metric}_count {hist.count}")
+		for name, value in sorted(self.derived().items()):
+			if value is None:
+				continue
+			metric = prefix + name
+			lines.append(f"# TYPE {metric} gauge")
+			lines.append(f"{metric} {value}")
+		return "\n".join(lines) + "\n"
+
+
+def write_metrics(metrics: EngineMetrics, path: str, fmt: str = "json") -> None:
+	"""Atomically (tmp file + rename) write *metrics* to *path*."""
+	out = Path(path)
+	out.parent.mkdir(parents=True, exist_ok=True)
+	body = metrics.to_prometheus() if fmt == "prometheus" else metrics.to_json()
+	tmp = out.with_name(f"{out.name}.tmp")
+	tmp.write_text(body, encoding="utf-8")
+	os.replace(tmp, out)
+
+
+class MeteredEngine(TranslationEngine):
+	"""Records call latency, batch size and error counters around *inner*."""
+
+	def __init__(self, inner: TranslationEngine, metrics: EngineMetrics):
+		self.inner = inner
+		self.name = inner.name
+		self.metrics = metrics
+
+	def cache_identity(self) -> Dict[str, Any]:
+		return self.inner.cache_identity()
+
+	def stats(self) -> Dict[str, Any]:
+		return self.inner.stats()
+
+	def translate(self, texts: List[str]) -> List[str]:
+		metrics = self.metrics
+		t0 = time.perf_counter()
+		try:
+			out = self.inner.translate(texts)
+		except Exception:
+			metrics.inc("engine_errors_total")
+			raise
+		metrics.observe("engine_call_seconds", time.perf_counter() - t0)
+		metrics.observe("engine_batch_size", len(texts), SIZE_BUCKETS)
+		metrics.inc("engine_calls_total")
+		metrics.inc("engine_texts_total", len(texts))
+		return out
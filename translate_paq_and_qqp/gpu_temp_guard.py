@@ -13,9 +13,10 @@ A CPU-side supervisor watches the GPU temperature by shelling out to
 The supervisor itself runs purely on the CPU and holds no GPU memory, so it
 can keep watching while the GPU is idle.
 
-Progress / resume point is read from the output XLSX's ``index`` column, so
-the worker just needs to keep flushing the file continuously (which it
-already does) and to append to an existing file instead of overwriting it.
+Progress / resume point is the last ``index`` saved to the output (read from
+the checkpoint sidecar written with every flush, see ``output_sink.py``), so
+the worker just needs to keep flushing the output continuously (which it
+already does) and to append to existing output instead of overwriting it.
 """
 
 from __future__ import annotations
@@ -146,7 +147,7 @@ def run_temp_guard_supervisor(
 	*,
 	script_path: str,
 	argv: List[str],
-	output_xlsx: str,
+	output_path: str,
 	initial_skip_rows: int,
 	temp_max: int,
 	temp_resume: int,
@@ -154,13 +155,15 @@ def run_temp_guard_supervisor(
 	check_interval: int,
 	gpu_index: int = 0,
 	log_fn: Callable[[str], None] = print,
+	read_last_index_fn: Callable[[str], Optional[int]] = read_last_index,
 ) -> int:
 	"""Run the CPU supervisor loop. Returns a process exit code.
 
 	*script_path* + *argv* is re-executed (with ``TRANSLATE_SUPERVISOR_CHILD=1``
 	and ``TRANSLATE_SKIP_ROWS=<n>`` in the environment) as the GPU worker. The
 	supervisor kills it at ``temp_max``, restarts it at ``temp_resume`` (resuming
-	from the last index found in *output_xlsx*), and aborts at ``temp_stop``.
+	from the last index found in *output_path*), and aborts at ``temp_stop``.
+	*read_last_index_fn* reads that index; the default handles XLSX files.
 	"""
 	env = os.environ.copy()
 	env["TRANSLATE_SUPERVISOR_CHILD"] = "1"
@@ -198,7 +201,7 @@ def run_temp_guard_supervisor(
 				return 2
 
 		# Compute the resume point from whatever is already saved.
-		last = read_last_index(output_xlsx)
+		last = read_last_index_fn(output_path)
 		skip = (last + 1) if last is not None else initial_skip_rows
 		env["TRANSLATE_SKIP_ROWS"] = str(skip)
 		cur = _temp()
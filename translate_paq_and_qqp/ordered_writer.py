@@ -0,0 +1,164 @@
+"""Background writer that orders results and persists them to an output sink.
+
+``MasterCoordinator`` hands every finished batch to an :class:`OrderedWriter`
+instead of reordering and flushing inline. The writer thread keeps the
+reorder buffer, appends rows to the :class:`~output_sink.OutputSink` in
+dataset order and flushes it by the ``--flush-every`` /
+``--flush-interval-seconds`` policy, so the master keeps collecting results
+and dispatching batches while the disk is busy.
+
+The hand-off queue is bounded (``max_queue`` batches). It only blocks the
+master when the writer is that far behind, which keeps memory bounded if the
+disk cannot keep up. :attr:`OrderedWriter.depth` / ``max_depth`` and the
+flush latencies recorded in :class:`~pipeline_stats.PipelineStats` show how
+close that is. The reorder buffer itself is bounded by the master, which
+stops dispatching past ``--reorder-window``; :attr:`OrderedWriter.buffered_rows`
+/ ``max_buffered_rows`` show its depth.
+
+With ``unordered=True`` (``--unordered``) there is no reorder buffer: rows go
+to the sink in the order their batches arrive, so a straggler batch no longer
+holds every later result back from disk. The sink's checkpoint records which
+index ranges are durable.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from output_sink import OutputSink
+from pipeline_stats import PipelineStats
+
+
+_CLOSE = object()
+_ABORT = object()
+
+
+class OrderedWriter:
+	"""Reorder rows by their first column (the dataset index) and write them.
+
+	Rows are lists in the sink's column order. :meth:`put` is called from the
+	master; everything else happens on the writer thread.
+	"""
+
+	def __init__(
+		self,
+		sink: OutputSink,
+		next_index: int,
+		flush_every: int,
+		flush_interval_seconds: float,
+		stats: Optional[PipelineStats] = None,
+		max_queue: int = 64,
+		unordered: bool = False,
+	):
+		self.sink = sink
+		self.unordered = unordered
+		self.flush_every = flush_every
+		self.flush_interval_seconds = flush_interval_seconds
+		self.stats = stats
+		self.saved_rows = 0
+		self.max_depth = 0
+		self.max_buffered_rows = 0
+		self._next_index = next_index
+		self._buffer: Dict[int, List[Any]] = {}
+		self._last_flush_time = time.monotonic()
+		self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_queue))
+		self._error: Optional[BaseException] = None
+		self._thread = threading.Thread(target=self._run, name="output-writer", daemon=True)
+
+	@property
+	def depth(self) -> int:
+		"""Batches handed over but not yet taken by the writer thread."""
+		return self._queue.qsize()
+
+	@property
+	def buffered_rows(self) -> int:
+		"""Rows waiting for an earlier index before they can be written."""
+		return len(self._buffer)
+
+	def start(self) -> "OrderedWriter":
+		self._thread.start()
+		return self
+
+	def put(self, rows: List[List[Any]]) -> None:
+		"""Queue a batch of rows; blocks only while the queue is full."""
+		self._put(rows)
+		self.max_depth = max(self.max_depth, self._queue.qsize())
+
+	def close(self) -> None:
+		"""Write everything that is in order, flush, and stop the thread."""
+		if self._thread.is_alive():
+			self._put(_CLOSE)
+			self._thread.join()
+		self._raise_if_failed()
+
+	def abort(self) -> None:
+		"""Stop the thread without a final flush (error path)."""
+		if self._thread.is_alive():
+			try:
+				self._queue.put(_ABORT, timeout=1.0)
+			except queue.Full:
+				return  # daemon thread; dies with the process
+			self._thread.join(timeout=5.0)
+
+	def _put(self, item: Any) -> None:
+		# A dead writer would never drain the queue: re-check while waiting.
+		while True:
+			self._raise_if_failed()
+			try:
+				self._queue.put(item, timeout=0.5)
+				return
+			except queue.Full:
+				continue
+
+	def _raise_if_failed(self) -> None:
+		if self._error is not None:
+			raise RuntimeError(f"Output writer failed: {self._error}") from self._error
+
+	def _run(self) -> None:
+		try:
+			while True:
+				timeout = max(0.05, self.flush_interval_seconds - (time.monotonic() - self._last_flush_time))
+				try:
+					item = self._queue.get(timeout=timeout)
+				except queue.Empty:
+					item = None
+				if item is _ABORT:
+					return
+				if item is _CLOSE:
+					self._drain()
+					self._flush(force=True)
+					return
+				if item is not None and self.unordered:
+					for row in item:
+						self.sink.append(row)
+				elif item is not None:
+					for row in item:
+						self._buffer[row[0]] = row
+					self.max_buffered_rows = max(self.max_buffered_rows, len(self._buffer))
+					self._drain()
+				if self.sink.pending_rows > 0 and (
+					self.sink.pending_rows >= self.flush_every
+					or time.monotonic() - self._last_flush_time >= self.flush_interval_seconds
+				):
+					self._flush()
+		except BaseException as exc:  # noqa: BLE001 - re-raised in the master
+			self._error = exc
+
+	def _drain(self) -> None:
+		while self._next_index in self._buffer:
+			self.sink.append(self._buffer.pop(self._next_index))
+			self._next_index += 1
+
+	def _flush(self, force: bool = False) -> None:
+		t0 = time.perf_counter()
+		written = self.sink.flush(force=force)
+		# Also after a no-op flush (a Parquet shard still below its size).
+		self._last_flush_time = time.monotonic()
+		if not written:
+			return
+		self.saved_rows += written
+		if self.stats is not None:
+			self.stats.add_flush(time.perf_counter() - t0)
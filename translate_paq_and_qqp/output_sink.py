@@ -0,0 +1,612 @@
+"""Append-only output sinks for the translated rows.
+
+Saving an openpyxl workbook re-serialises every row written so far, so with
+XLSX as the working format each flush gets slower as the run grows and the
+total I/O is quadratic. The scripts therefore write to an append-only sink and
+export XLSX once at the end (openpyxl write-only mode, see :func:`export_xlsx`):
+
+* ``jsonl`` - one JSON object per row appended to a single file. Each flush is
+  one ``write`` followed by one ``fsync``. On resume a torn trailing line
+  (crash mid-write) is cut off before appending.
+* ``parquet`` - a directory of ``part-NNNNN.parquet`` shards. Each flush of at
+  least ``min_shard_rows`` rows (or a forced one) becomes a new shard, written
+  to a temporary file and renamed into place, so a shard is either complete or
+  absent.
+* ``xlsx`` - the previous behaviour (the whole workbook saved on every flush),
+  kept for compatibility.
+
+After every flush the sink atomically rewrites a small sidecar checkpoint,
+``<output>.checkpoint.json`` (see :func:`write_checkpoint`), recording the
+last durable ``index``, the rows written and the output offset (bytes for
+JSONL, shard count for Parquet, data rows for XLSX). :func:`read_last_index`
+- what the GPU supervisor resumes from - and a resuming sink read that file
+instead of scanning the output, so a restart costs the same at row 100 as at
+row 100M. Bytes / shards past the checkpointed offset (a flush that crashed
+before its checkpoint) are discarded on resume. Without a checkpoint (output
+from an older version) both fall back to scanning the output.
+
+The checkpoint also keeps the durable indices as merged ``[start, end)``
+``ranges``. With ``--unordered`` rows are written in the order batches finish,
+so the highest index says nothing about the rows below it; the pipelines then
+resume from the gaps between those ranges (:func:`missing_ranges`) and
+:func:`finalize_sorted` can sort the finished output into index order.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from gpu_temp_guard import load_or_create_workbook, read_last_index as read_xlsx_last_index
+
+
+OUTPUT_FORMATS = ("jsonl", "parquet", "xlsx")
+
+# Path suffix per format (for Parquet, the suffix of the shard directory).
+_SUFFIXES = {"jsonl": ".jsonl", "parquet": ".parquet", "xlsx": ".xlsx"}
+
+
+def resolve_output_path(output_excel: str, output: Optional[str], output_format: str) -> Path:
+	"""The sink path: *output* if given, else *output_excel* with the format's suffix."""
+	if output_format not in OUTPUT_FORMATS:
+		raise ValueError(
+			f"Invalid output format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}."
+		)
+	if output:
+		return Path(output)
+	return Path(output_excel).with_suffix(_SUFFIXES[output_format])
+
+
+def format_of(path) -> str:
+	"""Output format implied by *path* (``.jsonl``, ``.parquet`` dir, else xlsx).
+
+	Only a fallback: ``--output`` may have any name, so callers that know the
+	``--output-format`` pass it to the readers below.
+	"""
+	suffix = Path(path).suffix.lower()
+	for fmt, fmt_suffix in _SUFFIXES.items():
+		if suffix == fmt_suffix:
+			return fmt
+	return "xlsx"
+
+
+class OutputSink:
+	"""Ordered, append-only destination for rows (one value per header).
+
+	The first column of every row is the dataset ``index``. Subclasses
+	implement :meth:`_write` (persist rows durably) and :meth:`_offset`.
+	"""
+
+	format = ""
+
+	def __init__(self, path, headers: List[str]):
+		self.path = Path(path)
+		self.headers = list(headers)
+		self.checkpoint_path = checkpoint_path(self.path)
+		self.rows_written = 0
+		self.last_index: Optional[int] = None
+		# Durable indices as merged [start, end) runs; None = not known
+		# (resumed from a checkpoint of an older version, see completed_ranges).
+		self.ranges: Optional[List[List[int]]] = []
+		self._pending: List[List[Any]] = []
+
+	@property
+	def pending_rows(self) -> int:
+		return len(self._pending)
+
+	def append(self, row: List[Any]) -> None:
+		"""Buffer *row* in memory; it becomes durable at the next :meth:`flush`."""
+		self._pending.append(row)
+
+	def flush(self, force: bool = False) -> int:
+		"""Persist buffered rows, then the checkpoint; return how many were written."""
+		if not self._pending or not self._should_write(force):
+			return 0
+		self._write(self._pending)
+		written = len(self._pending)
+		self.rows_written += written
+		indices = [row[0] for row in self._pending]
+		self.last_index = max(indices) if self.last_index is None else max(self.last_index, *indices)
+		if self.ranges is not None:
+			self.ranges = add_ranges(self.ranges, indices)
+		self._pending = []
+		self._write_checkpoint()
+		return written
+
+	def completed_ranges(self) -> List[List[int]]:
+		"""Durable indices as sorted, disjoint ``[start, end)`` ranges.
+
+		Comes from the checkpoint; output without recorded ranges is scanned
+		once.
+		"""
+		if self.ranges is None:
+			self.ranges = add_ranges([], (row[0] for row in iter_rows(self.path, ["index"], self.format)))
+		return self.ranges
+
+	def close(self) -> None:
+		"""Release the underlying file. Rows not yet flushed are dropped."""
+
+	def _should_write(self, force: bool) -> bool:
+		return True
+
+	def _write(self, rows: List[List[Any]]) -> None:
+		raise NotImplementedError
+
+	def _offset(self) -> int:
+		raise NotImplementedError
+
+	def _write_checkpoint(self) -> None:
+		write_checkpoint(self.checkpoint_path, {
+			"format": self.format,
+			"last_index": self.last_index,
+			"rows": self.rows_written,
+			"offset": self._offset(),
+			"ranges": self.ranges,
+			"updated": datetime.now().isoformat(timespec="seconds"),
+		})
+
+	def _resume_from(self, checkpoint: Dict[str, Any]) -> None:
+		self.rows_written = int(checkpoint.get("rows") or 0)
+		self.last_index = checkpoint.get("last_index")
+		ranges = checkpoint.get("ranges")
+		self.ranges = [list(r) for r in ranges] if isinstance(ranges, list) else None
+
+
+class JsonlSink(OutputSink):
+	format = "jsonl"
+
+	def __init__(self, path, headers: List[str], resume_append: bool = False):
+		super().__init__(path, headers)
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		if not (resume_append and self.path.exists()):
+			self._fh = open(self.path, "wb")
+			self._write_checkpoint()
+			return
+		checkpoint = read_checkpoint(self.path, "jsonl")
+		if checkpoint is not None:
+			# Drop whatever a crashed flush wrote after the last checkpoint.
+			with open(self.path, "rb+") as fh:
+				fh.truncate(checkpoint["offset"])
+			self._resume_from(checkpoint)
+		else:
+			_truncate_partial_line(self.path)
+			with open(self.path, "rb") as fh:
+				self.rows_written = sum(1 for _ in fh)
+			record = _last_jsonl_record(self.path)
+			self.last_index = record.get("index") if record else None
+			self.ranges = None
+		self._fh = open(self.path, "ab")
+		self._write_checkpoint()
+
+	def _write(self, rows: List[List[Any]]) -> None:
+		lines = [
+			json.dumps(dict(zip(self.headers, row)), ensure_ascii=False) + "\n"
+			for row in rows
+		]
+		self._fh.write("".join(lines).encode("utf-8"))
+		self._fh.flush()
+		os.fsync(self._fh.fileno())
+
+	def _offset(self) -> int:
+		return self._fh.tell()
+
+	def close(self) -> None:
+		self._fh.close()
+
+
+def _truncate_partial_line(path: Path) -> None:
+	"""Drop a trailing line without its newline (torn write before a crash)."""
+	with open(path, "rb+") as fh:
+		size = fh.seek(0, os.SEEK_END)
+		if size == 0:
+			return
+		fh.seek(size - 1)
+		if fh.read(1) == b"\n":
+			return
+		# Walk back to the previous newline in blocks.
+		pos = size
+		while pos > 0:
+			step = min(65536, pos)
+			pos -= step
+			fh.seek(pos)
+			cut = fh.read(step).rfind(b"\n")
+			if cut != -1:
+				fh.truncate(pos + cut + 1)
+				return
+		fh.truncate(0)
+
+
+class ParquetSink(OutputSink):
+	format = "parquet"
+
+	def __init__(self, path, headers: List[str], resume_append: bool = False,
+				 min_shard_rows: int = 1000):
+		super().__init__(path, headers)
+		self.min_shard_rows = max(1, min_shard_rows)
+		self.path.mkdir(parents=True, exist_ok=True)
+		existing = _parquet_shards(self.path)
+		checkpoint = read_checkpoint(self.path, "parquet") if resume_append else None
+		if checkpoint is not None:
+			self._resume_from(checkpoint)
+			self._next_shard = checkpoint["offset"]
+			# Shards renamed into place after the last checkpoint are dropped.
+			keep = {_shard_path(self.path, n) for n in range(self._next_shard)}
+			for shard in existing:
+				if shard not in keep:
+					shard.unlink()
+			return
+		if not resume_append:
+			for shard in existing:
+				shard.unlink()
+			existing = []
+		self._next_shard = (_shard_number(existing[-1]) + 1) if existing else 0
+		if existing:
+			import pyarrow.parquet as pq
+
+			# Shard footers only; the row data is not read.
+			self.rows_written = sum(pq.ParquetFile(shard).metadata.num_rows for shard in existing)
+			self.last_index = read_last_index(self.path, "parquet")
+			self.ranges = None
+		self._write_checkpoint()
+
+	def _should_write(self, force: bool) -> bool:
+		return force or len(self._pending) >= self.min_shard_rows
+
+	def _write(self, rows: List[List[Any]]) -> None:
+		import pyarrow as pa
+		import pyarrow.parquet as pq
+
+		columns = {h: [row[i] for row in rows] for i, h in enumerate(self.headers)}
+		table = pa.table(columns)
+		shard = _shard_path(self.path, self._next_shard)
+		tmp = shard.with_name(f".{shard.name}.tmp")
+		pq.write_table(table, tmp)
+		with open(tmp, "rb") as fh:
+			os.fsync(fh.fileno())
+		os.replace(tmp, shard)
+		self._next_shard += 1
+
+	def _offset(self) -> int:
+		return self._next_shard
+
+
+def _parquet_shards(directory: Path) -> List[Path]:
+	return sorted(directory.glob("part-*.parquet"))
+
+
+def _shard_path(directory: Path, number: int) -> Path:
+	return directory / f"part-{number:05d}.parquet"
+
+
+def _shard_number(shard: Path) -> int:
+	return int(shard.stem.split("-")[1])
+
+
+class XlsxSink(OutputSink):
+	"""Legacy sink: rows go into an openpyxl workbook saved whole on each flush."""
+
+	format = "xlsx"
+
+	def __init__(self, path, headers: List[str], resume_append: bool = False):
+		super().__init__(path, headers)
+		# openpyxl cannot append to a saved file, so resuming still loads the
+		# workbook; the resume point itself comes from the checkpoint.
+		self._workbook, self._sheet = load_or_create_workbook(
+			self.path, self.headers, resume_append=resume_append
+		)
+		self._temp_path = self.path.with_name(f"{self.path.stem}.tmp{self.path.suffix}")
+		checkpoint = read_checkpoint(self.path, "xlsx") if resume_append else None
+		extra = self._sheet.max_row - 1 - checkpoint["offset"] if checkpoint is not None else 0
+		if extra > 0:
+			# Saved by a flush that crashed before its checkpoint.
+			self._sheet.delete_rows(checkpoint["offset"] + 2, extra)
+		self.rows_written = self._sheet.max_row - 1
+		if self.rows_written > 0:
+			value = self._sheet.cell(row=self._sheet.max_row, column=1).value
+			self.last_index = int(value) if isinstance(value, (int, float)) else None
+			# Always written in index order
+			if self.last_index is not None:
+				first = self._sheet.cell(row=2, column=1).value
+				self.ranges = [[int(first), self.last_index + 1]] if isinstance(first, (int, float)) else None
+		self._write_checkpoint()
+
+	def _write(self, rows: List[List[Any]]) -> None:
+		for row in rows:
+			self._sheet.append(row)
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		try:
+			self._workbook.save(self._temp_path)
+			os.replace(self._temp_path, self.path)
+		except Exception:
+			if self._temp_path.exists():
+				self._temp_path.unlink()
+			raise
+
+	def _offset(self) -> int:
+		return self.rows_written
+
+
+def open_sink(path, output_format: str, headers: List[str], resume_append: bool = False) -> OutputSink:
+	"""Construct the sink for *output_format* at *path*."""
+	if output_format == "jsonl":
+		return JsonlSink(path, headers, resume_append=resume_append)
+	if output_format == "parquet":
+		return ParquetSink(path, headers, resume_append=resume_append)
+	if output_format == "xlsx":
+		return XlsxSink(path, headers, resume_append=resume_append)
+	raise ValueError(
+		f"Invalid output format '{output_format}'. Use one of: {', '.join(OUTPUT_FORMATS)}."
+	)
+
+
+# ---------------------------------------------------------------------------
+# Checkpoint sidecar
+# ---------------------------------------------------------------------------
+def checkpoint_path(path) -> Path:
+	"""Sidecar checkpoint of the output at *path* (``<name>.checkpoint.json``)."""
+	path = Path(path)
+	return path.with_name(f"{path.name}.checkpoint.json")
+
+
+def write_checkpoint(path, data: Dict[str, Any]) -> None:
+	"""Replace the checkpoint file at *path* atomically (temp file, fsync, rename)."""
+	path = Path(path)
+	tmp = path.with_name(f".{path.name}.tmp")
+	with open(tmp, "w", encoding="utf-8") as fh:
+		json.dump(data, fh)
+		fh.flush()
+		os.fsync(fh.fileno())
+	os.replace(tmp, path)
+
+
+def read_checkpoint(path, output_format: Optional[str] = None) -> Optional[Dict[str, Any]]:
+	"""Checkpoint of the output at *path*, or ``None`` if missing or stale.
+
+	A checkpoint is only trusted when it matches *output_format* (default: the
+	format implied by *path*) and the output still holds at least the
+	checkpointed offset.
+	"""
+	path = Path(path)
+	try:
+		with open(checkpoint_path(path), encoding="utf-8") as fh:
+			data = json.load(fh)
+	except (OSError, ValueError):
+		return None
+	fmt = output_format or format_of(path)
+	if not isinstance(data, dict) or data.get("format") != fmt or not isinstance(data.get("offset"), int):
+		return None
+	if fmt == "jsonl":
+		ok = path.is_file() and path.stat().st_size >= data["offset"]
+	elif fmt == "parquet":
+		ok = path.is_dir() and all(
+			_shard_path(path, n).exists() for n in range(data["offset"])
+		)
+	else:
+		ok = path.is_file()
+	return data if ok else None
+
+
+# ---------------------------------------------------------------------------
+# Completed index ranges (--unordered)
+# ---------------------------------------------------------------------------
+def add_ranges(ranges: List[List[int]], indices: Iterable[int]) -> List[List[int]]:
+	"""*ranges* (sorted, disjoint ``[start, end)``) merged with *indices*."""
+	runs: List[List[int]] = []
+	for index in sorted(indices):
+		if runs and index <= runs[-1][1]:
+			runs[-1][1] = max(runs[-1][1], index + 1)
+		else:
+			runs.append([index, index + 1])
+	merged: List[List[int]] = []
+	for start, end in sorted([list(r) for r in ranges] + runs):
+		if merged and start <= merged[-1][1]:
+			merged[-1][1] = max(merged[-1][1], end)
+		else:
+			merged.append([start, end])
+	return merged
+
+
+def missing_ranges(
+	ranges: List[List[int]], start: int, end: Optional[int]
+) -> List[Tuple[int, Optional[int]]]:
+	"""Parts of ``[start, end)`` not covered by *ranges*; ``end=None`` is open-ended."""
+	gaps: List[Tuple[int, Optional[int]]] = []
+	pos = start
+	for lo, hi in ranges:
+		if end is not None and lo >= end:
+			break
+		if hi <= pos:
+			continue
+		if lo > pos:
+			gaps.append((pos, lo))
+		pos = hi
+	if end is None:
+		gaps.append((pos, None))
+	elif pos < end:
+		gaps.append((pos, end))
+	return gaps
+
+
+def finalize_sorted(
+	path, headers: List[str], output_format: Optional[str] = None, run_rows: int = 200_000
+) -> int:
+	"""Rewrite the jsonl / parquet sink at *path* in ``index`` order.
+
+	External sort: the output is read in runs of *run_rows* rows, each run is
+	sorted and spilled to a temporary JSONL file, and the runs are merged
+	with :func:`heapq.merge` into a new sink of the same format, which then
+	replaces the original (with a fresh checkpoint). Memory stays at one run
+	whatever the size of the output. A row index seen twice is kept once.
+	*output_format* defaults to the format implied by *path*. Returns the
+	number of rows written.
+	"""
+	path = Path(path)
+	fmt = output_format or format_of(path)
+	if fmt not in ("jsonl", "parquet"):
+		raise ValueError(f"Cannot sort {path}; only jsonl and parquet outputs can be sorted.")
+	work = Path(tempfile.mkdtemp(prefix=f".{path.name}.sort-", dir=path.parent))
+	try:
+		runs: List[Path] = []
+		rows = iter_rows(path, headers, fmt)
+		while True:
+			chunk = [row for _, row in zip(range(run_rows), rows)]
+			if not chunk:
+				break
+			chunk.sort(key=lambda row: row[0])
+			run = work / f"run-{len(runs):05d}.jsonl"
+			with open(run, "w", encoding="utf-8") as fh:
+				fh.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in chunk)
+			runs.append(run)
+
+		def read_run(run: Path) -> Iterator[List[Any]]:
+			with open(run, encoding="utf-8") as fh:
+				for line in fh:
+					yield json.loads(line)
+
+		target = work / path.name
+		sink = open_sink(target, fmt, headers)
+		last = None
+		try:
+			for row in heapq.merge(*(read_run(run) for run in runs), key=lambda row: row[0]):
+				if row[0] == last:
+					continue
+				last = row[0]
+				sink.append(row)
+				if sink.pending_rows >= run_rows:
+					sink.flush(force=True)
+			sink.flush(force=True)
+		finally:
+			sink.close()
+		# Swap the sorted output in, then its checkpoint. The original waits
+		# in the work dir until both are in place and is put back if either
+		# move fails, so it is never removed with the work dir by mistake.
+		old = work / f"{path.name}.unsorted"
+		os.replace(path, old)
+		try:
+			os.replace(target, path)
+			os.replace(checkpoint_path(target), checkpoint_path(path))
+		except BaseException:
+			if path.exists():
+				os.replace(path, target)
+			os.replace(old, path)
+			raise
+		return sink.rows_written
+	finally:
+		shutil.rmtree(work, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Reading back (resume point, XLSX export)
+# ---------------------------------------------------------------------------
+def iter_rows(path, headers: List[str], output_format: Optional[str] = None) -> Iterator[List[Any]]:
+	"""Rows stored in the jsonl / parquet sink at *path*, in write order.
+
+	*output_format* defaults to the format implied by *path*.
+	"""
+	path = Path(path)
+	fmt = output_format or format_of(path)
+	if fmt == "jsonl":
+		if not path.exists():
+			return
+		with open(path, encoding="utf-8") as fh:
+			for line in fh:
+				if not line.endswith("\n"):
+					break  # torn trailing line
+				record: Dict[str, Any] = json.loads(line)
+				yield [record.get(h) for h in headers]
+	elif fmt == "parquet":
+		import pyarrow.parquet as pq
+
+		for shard in _parquet_shards(path) if path.is_dir() else []:
+			table = pq.read_table(shard, columns=headers)
+			columns = [table.column(h).to_pylist() for h in headers]
+			yield from (list(row) for row in zip(*columns))
+	else:
+		raise ValueError(f"Cannot stream rows from {path}; only jsonl and parquet outputs can be read back.")
+
+
+def read_last_index(path, output_format: Optional[str] = None) -> Optional[int]:
+	"""Highest ``index`` stored at *path* (any sink format), or ``None``.
+
+	Reads the checkpoint sidecar when there is a valid one (constant time);
+	otherwise scans the output. *output_format* defaults to the format
+	implied by *path*.
+	"""
+	path = Path(path)
+	fmt = output_format or format_of(path)
+	checkpoint = read_checkpoint(path, fmt)
+	if checkpoint is not None:
+		value = checkpoint.get("last_index")
+		return int(value) if isinstance(value, (int, float)) else None
+	if fmt == "xlsx":
+		return read_xlsx_last_index(path)
+	if not path.exists():
+		return None
+	if fmt == "parquet":
+		import pyarrow.parquet as pq
+
+		# Shards are written in order, so only the newest one matters.
+		for shard in reversed(_parquet_shards(path)):
+			values = pq.read_table(shard, columns=["index"]).column("index").to_pylist()
+			if values:
+				return max(values)
+		return None
+	# Rows are appended in index order, so the last complete line is enough.
+	record = _last_jsonl_record(path)
+	value = record.get("index") if record else None
+	return int(value) if isinstance(value, (int, float)) else None
+
+
+def _last_jsonl_record(path: Path) -> Optional[Dict[str, Any]]:
+	"""Last complete line of a JSONL file, read backwards from the end."""
+	with open(path, "rb") as fh:
+		pos = fh.seek(0, os.SEEK_END)
+		block = b""
+		while pos > 0:
+			step = min(65536, pos)
+			pos -= step
+			fh.seek(pos)
+			block = fh.read(step) + block
+			pieces = block.split(b"\n")
+			# The piece after the last newline is empty or torn; the first
+			# one may be cut by the block boundary unless we reached byte 0.
+			complete = pieces[:-1] if pos == 0 else pieces[1:-1]
+			for line in reversed(complete):
+				if line.strip():
+					return json.loads(line)
+	return None
+
+
+def export_xlsx(source, xlsx_path, headers: List[str], output_format: Optional[str] = None) -> int:
+	"""Write every row of the jsonl / parquet sink *source* to *xlsx_path*.
+
+	Uses openpyxl write-only mode (rows are streamed, memory stays flat) and a
+	temporary file + rename. *output_format* defaults to the format implied by
+	*source*. Returns the number of rows exported.
+	"""
+	from openpyxl import Workbook
+
+	out = Path(xlsx_path)
+	out.parent.mkdir(parents=True, exist_ok=True)
+	tmp = out.with_name(f"{out.stem}.tmp{out.suffix}")
+	wb = Workbook(write_only=True)
+	ws = wb.create_sheet('Hoja1')
+	ws.append(headers)
+	rows = 0
+	for row in iter_rows(source, headers, output_format):
+		ws.append(row)
+		rows += 1
+	try:
+		wb.save(tmp)
+		os.replace(tmp, out)
+	except Exception:
+		if tmp.exists():
+			tmp.unlink()
+		raise
+	return rows
@@ -0,0 +1,93 @@
+"""Timings of one pipeline run (rows, batch latency, output flushes).
+
+``translate_triplets_single`` / ``translate_pairs_single`` and
+``MasterCoordinator.run`` fill a :class:`PipelineStats` and return it, so the
+benchmark harness (``benchmark_pipeline.py``) and other callers can read the
+numbers without parsing logs.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+
+class PipelineStats:
+	"""Wall time, per-batch latency and output flush time of one run.
+
+	Batch latency is measured where the pipeline sees a batch: around the
+	engine call in single-process mode, and from dispatch to result at the
+	master in ``MasterCoordinator`` (so pickling and the wait behind the
+	worker's previous batch are included).
+	With ``MasterCoordinator`` flushes happen on the writer thread
+	(``ordered_writer.py``), and ``writer_queue_max`` is the deepest its
+	hand-off queue got; ``reorder_rows_max`` is the most rows its reorder
+	buffer held at once. With ``--global-dedup`` the batches are batches of
+	distinct strings and ``dedup_ratio`` is strings per distinct string in
+	the row range. ``cpu_seconds`` is the CPU time of the calling process:
+	the engine too in single-process mode, the master alone (result
+	handling, row rebuilding, writer thread) with ``MasterCoordinator``.
+	"""
+
+	def __init__(self):
+		self.started = time.perf_counter()
+		self.seconds: Optional[float] = None
+		self._cpu_started = time.process_time()
+		self.cpu_seconds: Optional[float] = None
+		self.rows = 0
+		self.batch_seconds: List[float] = []
+		self.flush_latencies: List[float] = []
+		self.writer_queue_max: Optional[int] = None
+		self.reorder_rows_max: Optional[int] = None
+		self.dedup_ratio: Optional[float] = None
+
+	def add_batch(self, seconds: float) -> None:
+		self.batch_seconds.append(seconds)
+
+	def add_flush(self, seconds: float) -> None:
+		self.flush_latencies.append(seconds)
+
+	def finish(self, rows: int) -> None:
+		self.rows = rows
+		self.seconds = time.perf_counter() - self.started
+		self.cpu_seconds = time.process_time() - self._cpu_started
+
+	def batch_quantile(self, q: float) -> Optional[float]:
+		"""Nearest-rank *q* quantile of the batch latencies (None if no batch)."""
+		return _quantile(self.batch_seconds, q)
+
+	def flush_quantile(self, q: float) -> Optional[float]:
+		"""Nearest-rank *q* quantile of the flush latencies (None if no flush)."""
+		return _quantile(self.flush_latencies, q)
+
+	def summary(self) -> Dict[str, Any]:
+		seconds = self.seconds if self.seconds is not None else time.perf_counter() - self.started
+		p50 = self.batch_quantile(0.5)
+		p99 = self.batch_quantile(0.99)
+		flush_p50 = self.flush_quantile(0.5)
+		flush_p99 = self.flush_quantile(0.99)
+		return {
+			"rows": self.rows,
+			"seconds": round(seconds, 3),
+			"rows_per_sec": round(self.rows / seconds, 2) if seconds > 0 else None,
+			"cpu_seconds": round(self.cpu_seconds, 3) if self.cpu_seconds is not None else None,
+			"batches": len(self.batch_seconds),
+			"batch_latency_p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+			"batch_latency_p99_ms": round(p99 * 1000, 2) if p99 is not None else None,
+			"flushes": len(self.flush_latencies),
+			"flush_seconds": round(sum(self.flush_latencies), 3),
+			"flush_latency_p50_ms": round(flush_p50 * 1000, 2) if flush_p50 is not None else None,
+			"flush_latency_p99_ms": round(flush_p99 * 1000, 2) if flush_p99 is not None else None,
+			"writer_queue_max": self.writer_queue_max,
+			"reorder_rows_max": self.reorder_rows_max,
+			"dedup_ratio": round(self.dedup_ratio, 3) if self.dedup_ratio is not None else None,
+		}
+
+
+def _quantile(values: List[float], q: float) -> Optional[float]:
+	if not values:
+		return None
+	ordered = sorted(values)
+	rank = max(1, math.ceil(q * len(ordered)))
+	return ordered[rank - 1]
@@ -0,0 +1,79 @@
+"""Process memory readings used for startup / benchmark reports.
+
+Reads ``/proc/<pid>/status`` (and ``smaps_rollup`` for PSS) on Linux.
+Elsewhere only the current process is supported (through :mod:`resource`),
+and other pids return ``None``.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from typing import Dict, Iterable, Optional
+
+
+def _status_field_mb(pid: Optional[int], field: str, name: str = "status") -> Optional[float]:
+	path = f"/proc/{pid if pid is not None else 'self'}/{name}"
+	try:
+		with open(path, encoding="ascii") as fh:
+			for line in fh:
+				if line.startswith(field + ":"):
+					# e.g. "VmRSS:	  123456 kB"
+					return int(line.split()[1]) / 1024.0
+	except (OSError, ValueError, IndexError):
+		pass
+	return None
+
+
+def rss_mb(pid: Optional[int] = None) -> Optional[float]:
+	"""Current resident set size of *pid* (default: this process) in MB."""
+	value = _status_field_mb(pid, "VmRSS")
+	if value is None and (pid is None or pid == os.getpid()):
+		return peak_rss_mb()
+	return value
+
+
+def peak_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+	"""Peak resident set size of *pid* (default: this process) in MB."""
+	value = _status_field_mb(pid, "VmHWM")
+	if value is not None or (pid is not None and pid != os.getpid()):
+		return value
+	try:
+		import resource
+	except ImportError:
+		return None
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+	return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def pss_mb(pid: Optional[int] = None) -> Optional[float]:
+	"""Proportional set size of *pid* in MB (Linux only).
+
+	Unlike RSS, pages shared between processes (e.g. model weights in shared
+	memory) are split evenly among them, so PSS values can be summed.
+	"""
+	return _status_field_mb(pid, "Pss", name="smaps_rollup")
+
+
+def memory_report(pids: Iterable[Optional[int]]) -> Dict[str, Optional[float]]:
+	"""Summed RSS and PSS (MB) over *pids*; a total is None if any reading is."""
+	pids = list(pids)
+	rss = [rss_mb(pid) for pid in pids]
+	pss = [pss_mb(pid) for pid in pids]
+	return {
+		"rss_mb": round(sum(rss), 1) if rss and None not in rss else None,
+		"pss_mb": round(sum(pss), 1) if pss and None not in pss else None,
+	}
+
+
+def peak_children_rss_mb() -> Optional[float]:
+	"""Largest peak RSS (MB) among the terminated, reaped child processes."""
+	try:
+		import resource
+	except ImportError:
+		return None
+	peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+	if not peak:
+		return None
+	return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
@@ -0,0 +1,98 @@
+"""Unique-string table for ``--global-dedup``.
+
+QQP triplets reuse the same questions across many rows (as query, positive
+and negative) and PAQ answers are dominated by a small set of entities and
+numbers, so a row range holds far fewer distinct strings than strings.
+:func:`build_string_table` counts them for the selected rows with vectorised
+Arrow compute (``value_counts`` over the text columns, no Python row
+objects). The pipelines then translate every distinct string once, most
+frequent first, and rebuild the output rows by lookup through a
+:class:`TableEngine`.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from datasets import Dataset
+
+from translation_engine import TranslationEngine
+
+
+class StringTable:
+	"""Distinct source strings of a row range, most frequent first."""
+
+	def __init__(self, strings: List[str], counts: List[int], rows: int):
+		self.strings = strings
+		self.counts = counts
+		self.rows = rows
+		# Strings the rows contain, counting repeats
+		self.total = sum(counts)
+
+	@property
+	def unique(self) -> int:
+		return len(self.strings)
+
+	@property
+	def dedup_ratio(self) -> float:
+		"""Strings per distinct string (1.0 = nothing repeats)."""
+		return self.total / self.unique if self.unique else 1.0
+
+	def strings_per_row(self) -> float:
+		return self.total / self.rows if self.rows else 0.0
+
+	def describe(self) -> str:
+		saved = 1 - self.unique / self.total if self.total else 0.0
+		return (
+			f"{self.rows} rows hold {self.total} strings, {self.unique} distinct "
+			f"(dedup ratio {self.dedup_ratio:.2f}, {saved:.0%} fewer strings to translate)"
+		)
+
+
+def build_string_table(
+	rows: Dataset,
+	text_columns: Callable[[pa.Table], List[pa.ChunkedArray]],
+) -> StringTable:
+	"""Count the strings of *rows* (from ``dataset_source.select_rows``).
+
+	*text_columns* maps the Arrow table of the rows to the string arrays that
+	get translated, e.g. the query, the first positive and the flattened
+	negatives of QQP. Needs a map-style dataset: a streamed one would have to
+	be read twice.
+	"""
+	if not isinstance(rows, Dataset):
+		raise ValueError("--global-dedup needs a map-style dataset (it cannot be used with --streaming).")
+	table = rows.with_format("arrow")[:]
+	chunks = [
+		chunk.cast(pa.string())
+		for column in text_columns(table)
+		for chunk in column.chunks
+	]
+	values = pc.drop_null(pa.chunked_array(chunks, type=pa.string()))
+	counted = pc.value_counts(values)
+	order = pc.array_sort_indices(counted.field("counts"), order="descending")
+	return StringTable(
+		counted.field("values").take(order).to_pylist(),
+		counted.field("counts").take(order).to_pylist(),
+		table.num_rows,
+	)
+
+
+class TableEngine(TranslationEngine):
+	"""Serves translations from a finished ``{source: translation}`` table.
+
+	Used to reassemble output rows once the distinct strings are translated;
+	a string missing from the table raises ``KeyError``. Null texts are not
+	counted by :func:`build_string_table` and come back as ``""``.
+	"""
+
+	name = "table"
+
+	def __init__(self, translations: Dict[str, str]):
+		self.translations = translations
+		self.batch_size = max(1, len(translations))
+
+	def translate(self, texts: List[str]) -> List[str]:
+		return ["" if t is None else self.translations[t] for t in texts]
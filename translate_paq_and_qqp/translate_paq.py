@@ -4,28 +4,57 @@ import argparse
 import multiprocessing as mp
 import time
 import sys
+from collections import deque
+from itertools import chain
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Dict, Tuple, Any
-from datasets import load_dataset
-from openpyxl import Workbook
+from typing import Optional, List, Dict, Set, Tuple, Any
+
+import pyarrow.compute as pc
 
 from translation_engine import (
 	make_engine,
 	engine_config_from_args,
 	add_engine_args,
+	translate_unique,
+	load_shared_weights,
 	RetryExhaustedError,
 )
-from gpu_temp_guard import run_temp_guard_supervisor, load_or_create_workbook
-
-
-# ---------------------------------------------------------------------------
-# Message type constants for inter-process communication
-# ---------------------------------------------------------------------------
-MSG_BATCH_RESULT = 'batch_result'
-MSG_WORKER_READY = 'worker_ready'
-MSG_WORKER_ERROR = 'worker_error'
-MSG_WORKER_DONE = 'worker_done'
+from gpu_temp_guard import run_temp_guard_supervisor
+from engine_metrics import EngineMetrics, write_metrics
+from dataset_source import (
+	expected_rows,
+	iter_batches,
+	load_source_dataset,
+	prefetch,
+	select_rows,
+)
+from output_sink import (
+	OUTPUT_FORMATS,
+	OutputSink,
+	export_xlsx,
+	finalize_sorted,
+	missing_ranges,
+	open_sink,
+	read_last_index,
+	resolve_output_path,
+)
+from batch_sizing import AdaptiveBatchSize
+from string_table import StringTable, TableEngine, build_string_table
+from ordered_writer import OrderedWriter
+from worker_pool import (
+	MSG_BATCH_RESULT,
+	MSG_WORKER_DONE,
+	MSG_WORKER_ERROR,
+	MSG_WORKER_EXIT,
+	MSG_WORKER_METRICS,
+	MSG_WORKER_READY,
+	WorkerPool,
+	start_task_reader,
+)
+from proc_stats import memory_report
+from pipeline_stats import PipelineStats
+from cpu_layout import CpuLayout, apply_cpu_layout, available_cores, parse_threads_per_worker, plan_cpu_layout
 
 
 def configure_cache(base: Path):
@@ -35,50 +64,111 @@ def configure_cache(base: Path):
 	os.environ['HF_DATASETS_CACHE'] = str(base / '.cache')
 
 
+# ---------------------------------------------------------------------------
+# Batch translation (shared by the worker and single-process modes)
+# ---------------------------------------------------------------------------
+def pair_texts(batch: List[Tuple[int, str, str]]) -> List[str]:
+	"""Question and answer of every row of *batch*, row by row."""
+	texts: List[str] = []
+	for _, Q_original, A_original in batch:
+		texts.append(Q_original)
+		texts.append(A_original)
+	return texts
+
+
+def translate_pair_batch(
+	engine,
+	batch: List[Tuple[int, str, str]],
+) -> List[Dict[str, Any]]:
+	"""Translate a batch of (index, Q, A) rows with one flattened call.
+
+	Questions and answers of the whole batch are de-duplicated by
+	:func:`translate_unique` (PAQ answers repeat a lot) and sent to the engine
+	in engine-sized chunks; the translations are then scattered back per row.
+	"""
+	translated = translate_unique(engine, pair_texts(batch))
+
+	results: List[Dict[str, Any]] = []
+	for n, (dataset_index, Q_original, A_original) in enumerate(batch):
+		results.append({
+			'index': dataset_index,
+			'Q_original': Q_original,
+			'A_original': A_original,
+			'Q_traducida': translated[2 * n],
+			'A_traducida': translated[2 * n + 1],
+		})
+	return results
+
+
+def pair_from_record(index: int, data: Dict[str, Any]) -> Tuple[int, str, str]:
+	"""(index, question, answer) from one PAQ_pairs record."""
+	return (index, data["set"][0], data["set"][1])
+
+
+def pair_text_columns(table) -> List[Any]:
+	"""Arrow arrays of the strings :func:`pair_from_record` rows translate.
+
+	The vectorised counterpart used by ``--global-dedup``'s pre-pass: the
+	question and the answer.
+	"""
+	rows = table.column("set")
+	return [pc.list_element(rows, 0), pc.list_element(rows, 1)]
+
+
 # ---------------------------------------------------------------------------
 # Worker (slave) process
 # ---------------------------------------------------------------------------
 def worker_process(
 	worker_id: int,
-	task_queue: mp.Queue,
-	result_queue: mp.Queue,
+	conn,
 	engine_config: Dict[str, Any],
+	cpu_layout: Optional[CpuLayout] = None,
 ):
 	"""
-	Slave worker process. Loads the translation engine and waits for batches
-	from the master via *task_queue*. Each batch is a list of
-	(dataset_index, Q_original, A_original) tuples.
-	Results are sent back through *result_queue*.
+	Slave worker process. Loads the translation engine and translates the
+	``(batch_id, texts)`` tasks the master sends on *conn*, its own pipe. The
+	pipe is read on a thread, so the next batch is already here when the
+	current one is done. *texts* are the distinct source strings of a batch
+	and only their translations go back, as ``(batch_id, translated,
+	seconds)``: the master keeps the rows and rebuilds them.
 	"""
+	# Ctrl-C in a terminal reaches the whole process group: only the master
+	# handles it, and stops the workers itself.
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
 	try:
+		if cpu_layout is not None:
+			apply_cpu_layout(
+				cpu_layout,
+				uses_torch=engine_config.get("engine") in ("transformers", "routing"),
+			)
 		configure_cache(Path.cwd())
-		engine = make_engine(**engine_config)
-		result_queue.put((MSG_WORKER_READY, worker_id, None))
+		# Each worker draws its own stub jitter/failures (--stub-seed + worker id)
+		engine = make_engine(**dict(engine_config, stub_seed=engine_config.get("stub_seed", 0) + worker_id))
+		tasks = start_task_reader(conn)
+		conn.send((MSG_WORKER_READY, worker_id, None))
 
 		while True:
-			task = task_queue.get()
+			task = tasks.get()
 			if task is None:
 				# Sentinel: no more work
-				result_queue.put((MSG_WORKER_DONE, worker_id, None))
+				stats = engine.stats()
+				if stats:
+					print(f"[worker {worker_id}] engine stats: {stats}")
+				conn.send((MSG_WORKER_DONE, worker_id, None))
 				break
 
-			batch: List[Tuple[int, str, str]] = task
-			results: List[Dict[str, Any]] = []
-
-			for dataset_index, Q_original, A_original in batch:
-				Q_traducida, A_traducida = engine.translate([Q_original, A_original])
-				results.append({
-					'index': dataset_index,
-					'Q_original': Q_original,
-					'A_original': A_original,
-					'Q_traducida': Q_traducida,
-					'A_traducida': A_traducida,
-				})
-
-			result_queue.put((MSG_BATCH_RESULT, worker_id, results))
+			batch_id, texts = task
+			t0 = time.perf_counter()
+			translated = translate_unique(engine, texts)
+			seconds = time.perf_counter() - t0
+			if engine.metrics is not None:
+				# Sent before the result so the master has it when the last
+				# batch completes. Snapshots are cumulative per worker.
+				conn.send((MSG_WORKER_METRICS, worker_id, engine.metrics.snapshot()))
+			conn.send((MSG_BATCH_RESULT, worker_id, (batch_id, translated, seconds)))
 
 	except Exception as exc:
-		result_queue.put((MSG_WORKER_ERROR, worker_id, exc))
+		conn.send((MSG_WORKER_ERROR, worker_id, exc))
 
 
 # ---------------------------------------------------------------------------
@@ -88,11 +178,29 @@ class MasterCoordinator:
 	"""
 	Master node that:
 	1. Loads the dataset and creates batches of rows.
-	2. Dispatches batches to worker processes via per-worker task queues.
-	3. Collects results and reorders them by original dataset index.
-	4. Writes ordered results to a single XLSX file.
+	2. Keeps every worker process (worker_pool.py) supplied with one batch
+	   in work and one prefetched. With --target-batch-seconds the batch
+	   size adapts to the observed latency.
+	3. Hands results to a writer thread (ordered_writer.py) that reorders them
+	   by original dataset index and writes them to an append-only output sink
+	   (JSONL, Parquet or XLSX, see output_sink.py). Dispatch stays within
+	   --reorder-window rows of the oldest unfinished batch (an idle worker
+	   always gets one batch), which bounds the reorder buffer when one batch
+	   is slow.
+	   With --global-dedup the workers translate the distinct strings of the
+	   row range instead (most frequent first) and the rows are rebuilt from
+	   them at the end (string_table.py).
+	4. Re-dispatches the batches of a worker that crashes or dies and starts a
+	   replacement (within --max-worker-restarts).
+	5. Exports the output to XLSX at the end.
+
+	With --unordered rows are written as soon as their batch comes back, not
+	in dataset order; a resumed run translates only the index ranges missing
+	from the output, and --finalize sorts the output by index at the end.
 	"""
 
+	XLSX_HEADERS = ['index', 'Q_original', 'A_original', 'Q_traducida', 'A_traducida']
+
 	def __init__(
 		self,
 		output_excel: str,
@@ -106,6 +214,22 @@ class MasterCoordinator:
 		flush_interval_seconds: float,
 		dataset_name: str,
 		resume_append: bool = False,
+		metrics_file: Optional[str] = None,
+		metrics_format: str = "json",
+		metrics_interval: float = 60.0,
+		share_weights: bool = False,
+		threads_per_worker: Optional[Any] = None,
+		pin_workers: bool = False,
+		streaming: bool = False,
+		output_format: str = "jsonl",
+		output_path: Optional[str] = None,
+		xlsx_export: bool = True,
+		target_batch_seconds: float = 0.0,
+		max_worker_restarts: int = 3,
+		global_dedup: bool = False,
+		reorder_window: int = 0,
+		unordered: bool = False,
+		finalize: bool = False,
 	):
 		self.output_excel = output_excel
 		self.log_file = log_file
@@ -118,91 +242,173 @@ class MasterCoordinator:
 		self.flush_interval_seconds = flush_interval_seconds
 		self.dataset_name = dataset_name
 		self.resume_append = resume_append
-
-		# Results bookkeeping
-		self._results_buffer: Dict[int, Dict[str, Any]] = {}
-		self._next_write_index: int = skip_rows
-
-		# XLSX writer state
-		self._workbook: Optional[Workbook] = None
-		self._sheet = None
-		self._pending_rows: int = 0
-		self._saved_rows: int = 0
-		self._last_flush_time: float = time.monotonic()
-		self._temp_path: Optional[Path] = None
-		self._output_path: Optional[Path] = None
-
-	def run(self) -> None:
+		self.metrics_file = metrics_file
+		self.metrics_format = metrics_format
+		self.metrics_interval = metrics_interval
+		self.share_weights = share_weights
+		self.threads_per_worker = threads_per_worker
+		self.pin_workers = pin_workers
+		self.streaming = streaming
+		self.output_format = output_format
+		self.output_path = output_path
+		self.xlsx_export = xlsx_export
+		self.target_batch_seconds = target_batch_seconds
+		self.max_worker_restarts = max_worker_restarts
+		self.global_dedup = global_dedup
+		self.reorder_window = reorder_window
+		self.unordered = unordered
+		self.finalize = finalize
+
+		# Timings of the current run (returned by run())
+		self.stats = PipelineStats()
+
+		# Latest cumulative metrics snapshot per worker
+		self._worker_metrics: Dict[int, Dict[str, Any]] = {}
+		self._last_metrics_dump: float = time.monotonic()
+
+		# Output: the sink and the thread that orders and flushes it
+		self._sink: Optional[OutputSink] = None
+		self._writer: Optional[OrderedWriter] = None
+
+	def run(self) -> PipelineStats:
+		if self.unordered and self.global_dedup:
+			raise ValueError("--global-dedup writes the rows in order at the end; it cannot be used with --unordered.")
+		self.stats = PipelineStats()
 		configure_cache(Path.cwd())
-		dataset = load_dataset(self.dataset_name, streaming=False, split="train")
-		self._output_path = Path(self.output_excel)
-		self._temp_path = self._output_path.with_name(
-			f"{self._output_path.stem}.tmp{self._output_path.suffix}"
+		dataset = load_source_dataset(self.dataset_name, streaming=self.streaming)
+		# Open the output sink (resume-append if output already exists)
+		self._sink = open_sink(
+			resolve_output_path(self.output_excel, self.output_path, self.output_format),
+			self.output_format, self.XLSX_HEADERS, resume_append=self.resume_append,
 		)
-
-		# Prepare XLSX workbook (resume-append if the file already exists)
-		headers = ['index', 'Q_original', 'A_original', 'Q_traducida', 'A_traducida']
-		self._workbook, self._sheet = load_or_create_workbook(
-			self._output_path, headers, resume_append=self.resume_append
+		# Reordering and flushing run on their own thread so that a slow flush
+		# never stalls result collection or dispatch.
+		self._writer = OrderedWriter(
+			self._sink, self.skip_rows, self.flush_every, self.flush_interval_seconds,
+			stats=self.stats, unordered=self.unordered,
+		).start()
+
+		# Batches are produced lazily while dispatching: memory stays flat and
+		# dispatch starts as soon as the workers are ready.
+		# select_rows jumps straight to --skip-rows instead of scanning to it.
+		rows = select_rows(dataset, self.skip_rows, self.max_rows)
+		# Row ranges to translate as (first index, rows). An unordered output
+		# can have holes below its highest index: resume fills those.
+		spans: List[Tuple[int, Any]] = [(self.skip_rows, rows)]
+		if self.unordered and self.resume_append:
+			end = None if self.max_rows is None else self.skip_rows + self.max_rows
+			missing = missing_ranges(self._sink.completed_ranges(), self.skip_rows, end)
+			spans = [
+				(start, select_rows(dataset, start, None if stop is None else stop - start))
+				for start, stop in missing
+			]
+			print(f"Resuming unordered output ({self._sink.rows_written} rows already written): "
+				  f"{len(missing)} missing index range(s), from index "
+				  f"{missing[0][0] if missing else '-'}")
+		counts = [expected_rows(part) for _, part in spans]
+		total_rows = None if None in counts else sum(counts)
+		batch_size = self.batch_size
+		# --global-dedup: the workers translate each distinct string of the
+		# range once, most frequent first; the rows are rebuilt by lookup once
+		# all of them are done.
+		table: Optional[StringTable] = None
+		translations: Optional[Dict[str, str]] = None
+		if self.global_dedup:
+			table = build_string_table(rows, pair_text_columns)
+			translations = {}
+			self.stats.dedup_ratio = table.dedup_ratio
+			# Strings per batch: about as much work as --batch-size rows
+			batch_size = self.batch_size * max(1, round(table.strings_per_row()))
+			print(f"Global dedup: {table.describe()}")
+		sizer = (
+			AdaptiveBatchSize(batch_size, self.target_batch_seconds)
+			if self.target_batch_seconds > 0 else None
 		)
-
-		# Build batches from the dataset
-		batches: List[List[Tuple[int, str, str]]] = []
-		current_batch: List[Tuple[int, str, str]] = []
-		processed = 0
-
-		for i, data in enumerate(dataset):
-			if i < self.skip_rows:
-				continue
-			if self.max_rows is not None and processed >= self.max_rows:
-				break
-			Q_original = data["set"][0]
-			A_original = data["set"][1]
-			current_batch.append((i, Q_original, A_original))
-			processed += 1
-			if len(current_batch) >= self.batch_size:
-				batches.append(current_batch)
-				current_batch = []
-		if current_batch:
-			batches.append(current_batch)
-
-		total_rows = processed
-		total_batches = len(batches)
-		print(f"Dataset loaded: {total_rows} rows in {total_batches} batches "
-			  f"(batch_size={self.batch_size}, workers={self.num_workers})")
+		if table is not None:
+			batches = iter_batches(table.strings, lambda _index, text: text, sizer or batch_size)
+			total_items = table.unique
+		else:
+			batches = chain.from_iterable(
+				iter_batches(part, pair_from_record, sizer or batch_size, start_index=start)
+				for start, part in spans
+			)
+			total_items = total_rows
+		if self.streaming:
+			batches = prefetch(batches)
+		total_batches = (
+			-(-total_items // batch_size) if total_items is not None and sizer is None else None
+		)
+		batch_desc = (
+			f"batch_size={batch_size}" if sizer is None else
+			f"batch_size={sizer.size} adapting to {self.target_batch_seconds}s "
+			f"within [{sizer.min_size}, {sizer.max_size}]"
+		)
+		print(f"Dataset opened: {total_rows if total_rows is not None else 'unknown number of'} "
+			  f"rows to translate ({batch_desc}, workers={self.num_workers}, "
+			  f"streaming={self.streaming}, " + (
+				  "unordered output)" if self.unordered else
+				  (f"reorder window={self.reorder_window} rows)" if self.reorder_window
+				   else "reorder window=8 x workers x batch size)")
+			  ))
 
 		# Multiprocessing infrastructure
 		ctx = mp.get_context('spawn')
-		task_queues: List[mp.Queue] = []
-		result_queue: mp.Queue = ctx.Queue()
-
-		# Start worker processes
-		workers: List[mp.Process] = []
-		for wid in range(self.num_workers):
-			tq = ctx.Queue()
-			task_queues.append(tq)
-			p = ctx.Process(
-				target=worker_process,
-				args=(wid, tq, result_queue, self.engine_config),
-				name=f'worker-{wid}',
-				daemon=True,
+		startup_start = time.perf_counter()
+		worker_engine_config = self.engine_config
+		if self.share_weights:
+			# Load once here; every worker attaches to the same shared-memory
+			# tensors instead of reading and holding its own copy.
+			if self.engine_config.get("engine") != "transformers":
+				raise ValueError("--share-weights requires --engine transformers.")
+			shared = load_shared_weights(
+				model_name=self.engine_config["model_name"],
+				device=self.engine_config.get("device"),
+				precision=self.engine_config.get("precision", "fp32"),
+			)
+			worker_engine_config = dict(self.engine_config, shared_weights=shared)
+			print(f"Loaded shared model weights in {time.perf_counter() - startup_start:.1f}s")
+
+		# CPU layout: split the cores between workers instead of letting each
+		# one use all of them.
+		layouts: List[Optional[CpuLayout]] = [None] * self.num_workers
+		if self.threads_per_worker is not None or self.pin_workers:
+			layouts = plan_cpu_layout(
+				self.num_workers, self.threads_per_worker or "auto", pin=self.pin_workers
 			)
-			workers.append(p)
-			p.start()
+			cores = len(available_cores())
+			print(f"CPU layout ({cores} available cores):")
+			for layout in layouts:
+				print(f"  {layout.describe()}")
+			if self.num_workers * layouts[0].threads > cores:
+				print(f"  Warning: {self.num_workers * layouts[0].threads} threads "
+					  f"oversubscribe {cores} cores.")
+
+		# Start worker processes, each on its own pipe (worker_pool.py): a
+		# worker that dies cannot block the others.
+		pool = WorkerPool(
+			ctx, worker_process,
+			lambda slot: (worker_engine_config, layouts[slot]),
+			self.num_workers, max_restarts=self.max_worker_restarts,
+		)
 
 		print(f"Started {self.num_workers} worker processes, waiting for engine to load...")
 
 		# Wait for all workers to signal readiness
-		ready_workers = set()
-		while len(ready_workers) < self.num_workers:
-			msg_type, wid, payload = result_queue.get()
-			if msg_type == MSG_WORKER_READY:
-				ready_workers.add(wid)
-				print(f"  Worker {wid} ready.")
-			elif msg_type == MSG_WORKER_ERROR:
-				raise RuntimeError(f"Worker {wid} failed during startup: {payload}")
-
-		print("All workers ready. Distributing batches...")
+		while pool.starting:
+			for msg_type, wid, payload in pool.receive(timeout=None):
+				if msg_type == MSG_WORKER_READY:
+					pool.mark_ready(wid)
+					print(f"  Worker {wid} ready.")
+				elif msg_type == MSG_WORKER_ERROR:
+					raise RuntimeError(f"Worker {wid} failed during startup: {payload}")
+				elif msg_type == MSG_WORKER_EXIT:
+					raise RuntimeError(f"Worker {wid} exited during startup (exit code {payload})")
+
+		memory = memory_report([None] + pool.pids())
+		print(f"All workers ready in {time.perf_counter() - startup_start:.1f}s "
+			  f"(shared weights: {'yes' if self.share_weights else 'no'}, "
+			  f"total RSS: {memory['rss_mb']} MB, total PSS: {memory['pss_mb']} MB). "
+			  "Distributing batches...")
 
 		# Open log file
 		f_log = open(self.log_file, 'w', encoding='utf-8', buffering=1)
@@ -221,92 +427,210 @@ class MasterCoordinator:
 			previous_handlers[signum] = signal.getsignal(signum)
 			signal.signal(signum, handle_stop)
 
-		# Dispatch initial batches: one per worker
-		batch_idx = 0
-		active_workers = set(range(self.num_workers))
+		# Batches not finished yet -> when they were first dispatched, their
+		# rows, and the distinct strings sent to the worker (kept to dispatch
+		# them again if the worker dies). Workers only send translations
+		# back; the rows are rebuilt here.
+		dispatched_at: Dict[int, float] = {}
+		batch_rows: Dict[int, List[Any]] = {}
+		batch_texts: Dict[int, List[str]] = {}
+		# Batches of lost workers, dispatched again before any new batch
+		requeued: deque = deque()
+		next_batch_id = 0
+		input_exhausted = False
+		# Reorder window: a new row batch is only dispatched while it starts
+		# fewer than window_rows() rows past the oldest unfinished one. Rows
+		# that finish early wait in the writer's reorder buffer, so this
+		# bounds it (plus one batch per worker: an idle worker always gets a
+		# batch, so a window smaller than the batches cannot starve it). An
+		# unordered writer has no such buffer.
+		next_row = self.skip_rows
+
+		def window_rows() -> int:
+			"""--reorder-window, or 8 x workers x the current batch size."""
+			if self.reorder_window:
+				return self.reorder_window
+			return 8 * self.num_workers * (sizer.size if sizer is not None else batch_size)
+
+		def rows_ahead() -> int:
+			"""Rows dispatched past the oldest unfinished row batch."""
+			if not dispatched_at:
+				return 0
+			return next_row - min(batch_rows[b][0][0] for b in dispatched_at)
+
+		def fill_workers() -> None:
+			"""Keep one batch in work and one prefetched on every ready worker."""
+			nonlocal next_batch_id, input_exhausted, next_row
+			for wid in sorted(pool.ready):
+				while len(pool.assigned[wid]) < 2:
+					if requeued:
+						batch_id = requeued.popleft()
+					elif stop_requested or input_exhausted:
+						return
+					elif (table is None and not self.unordered and pool.assigned[wid]
+						  and rows_ahead() >= window_rows()):
+						break  # wait for the oldest batch to finish
+					else:
+						batch = next(batches, None)
+						if batch is None:
+							input_exhausted = True
+							return
+						if table is None:
+							next_row = batch[-1][0] + 1
+						batch_id = next_batch_id
+						next_batch_id += 1
+						dispatched_at[batch_id] = time.perf_counter()
+						batch_rows[batch_id] = batch
+						batch_texts[batch_id] = (
+							batch if table is not None else list(dict.fromkeys(pair_texts(batch)))
+						)
+					if not pool.send(wid, batch_id, batch_texts[batch_id]):
+						# Pipe already broken; the exit is picked up by receive().
+						requeued.appendleft(batch_id)
+						break
+
+		def recover_worker(wid: int, reason: str) -> None:
+			"""Dispatch *wid*'s batches again and start a replacement worker.
+
+			Replacements are limited to --max-worker-restarts per run; once the
+			budget is spent the remaining workers carry on alone, and the run
+			fails if none are left.
+			"""
+			print(f"Worker {wid} lost: {reason}")
+			f_log.write(f"{datetime.now()},0,-,Worker {wid} perdido: {reason}\n")
+			lost = [b for b in pool.lose(wid) if b in dispatched_at]
+			if stop_requested:
+				# Stopping anyway: no replacement, and its batches are dropped
+				# (a resumed run translates them).
+				for b in lost:
+					del dispatched_at[b]
+					batch_rows.pop(b, None)
+					batch_texts.pop(b, None)
+				if lost:
+					print(f"  Dropped {len(lost)} unfinished batch(es) while stopping.")
+				return
+			if lost:
+				requeued.extendleft(reversed(lost))
+				if table is None:
+					starts = ", ".join(str(batch_rows[b][0][0]) for b in lost)
+					print(f"  Re-queued {len(lost)} batch(es) starting at rows {starts}.")
+				else:
+					print(f"  Re-queued {len(lost)} batch(es) of distinct strings.")
+			new_wid = pool.replace(wid)
+			if new_wid is not None:
+				print(f"  Started worker {new_wid} to replace it "
+					  f"({pool.restarts}/{self.max_worker_restarts} restarts used).")
+			elif not pool.live:
+				raise RuntimeError(
+					f"Stopping pipeline: worker {wid} lost ({reason}) and the "
+					f"restart budget (--max-worker-restarts {self.max_worker_restarts}) is used up."
+				)
 
-		for wid in range(self.num_workers):
-			if batch_idx < total_batches and not stop_requested:
-				task_queues[wid].put(batches[batch_idx])
-				batch_idx += 1
+		fill_workers()
 
 		batches_done = 0
+		rows_done = 0
 
 		try:
-			while batches_done < total_batches and not stop_requested:
-				# Block waiting for a result from any worker
-				msg_type, wid, payload = result_queue.get()
-
-				if msg_type == MSG_WORKER_ERROR:
-					print(f"Worker {wid} crashed: {payload}")
-					f_log.write(f"{datetime.now()},0,-,Worker {wid} crashed: {payload}\n")
-					active_workers.discard(wid)
-					# Retry exhaustion is fatal -> stop the whole pipeline.
-					# Other transient worker crashes just retire the worker.
-					if isinstance(payload, RetryExhaustedError) or not active_workers:
-						raise RuntimeError(
-							f"Stopping pipeline due to worker {wid} error: {payload}"
-						)
-					continue
-
-				if msg_type == MSG_WORKER_DONE:
-					active_workers.discard(wid)
-					continue
-
-				if msg_type != MSG_BATCH_RESULT:
-					continue
-
-				# Process batch results
-				results: List[Dict[str, Any]] = payload
-				for r in results:
-					idx = r['index']
-					self._results_buffer[idx] = r
-					f_log.write(f"{datetime.now()},0,{idx},Procesado por worker {wid}\n")
-
-				batches_done += 1
-
-				# Flush ordered results to XLSX
-				self._flush_ordered()
-
-				if batches_done % 5 == 0 or batches_done == total_batches:
-					print(
-						f"Progress: {batches_done}/{total_batches} batches done, "
-						f"{self._saved_rows} rows written to XLSX"
-					)
-
-				# Send next batch to this worker if available
-				if batch_idx < total_batches and not stop_requested and wid in active_workers:
-					task_queues[wid].put(batches[batch_idx])
-					batch_idx += 1
-
-			# Send stop sentinels to all active workers
-			for wid in range(self.num_workers):
-				if wid in active_workers:
-					task_queues[wid].put(None)
-
-			# Drain remaining results from workers
-			while batches_done < total_batches and active_workers:
-				try:
-					msg_type, wid, payload = result_queue.get(timeout=10.0)
-				except Exception:
-					break
-
-				if msg_type == MSG_WORKER_DONE or msg_type == MSG_WORKER_ERROR:
-					active_workers.discard(wid)
-					continue
-
-				if msg_type == MSG_BATCH_RESULT:
-					results = payload
-					for r in results:
-						self._results_buffer[r['index']] = r
+			while dispatched_at:
+				for msg_type, wid, payload in pool.receive(timeout=1.0):
+					if wid not in pool.live:
+						continue  # already lost or retired
+
+					if msg_type == MSG_WORKER_METRICS:
+						self._worker_metrics[wid] = payload
+						self._dump_metrics()
+						continue
+
+					if msg_type == MSG_WORKER_READY:
+						pool.mark_ready(wid)
+						print(f"  Worker {wid} ready.")
+						continue
+
+					if msg_type == MSG_WORKER_EXIT:
+						recover_worker(wid, f"process exited with code {payload}")
+						continue
+
+					if msg_type == MSG_WORKER_ERROR:
+						# Retry exhaustion is fatal -> stop the whole pipeline.
+						# Other worker errors re-queue the batches and replace the worker.
+						if isinstance(payload, RetryExhaustedError):
+							f_log.write(f"{datetime.now()},0,-,Worker {wid} crashed: {payload}\n")
+							raise RuntimeError(
+								f"Stopping pipeline due to worker {wid} error: {payload}"
+							)
+						recover_worker(wid, f"error: {payload!r}")
+						continue
+
+					if msg_type != MSG_BATCH_RESULT:
+						continue
+
+					# Process batch results
+					batch_id, results, seconds = payload
+					pool.finished(wid, batch_id)
+					if batch_id not in dispatched_at:
+						continue
+					self.stats.add_batch(time.perf_counter() - dispatched_at.pop(batch_id))
+					batch = batch_rows.pop(batch_id)
+					texts = batch_texts.pop(batch_id)
+					if sizer is not None:
+						sizer.observe(len(batch), seconds)
 					batches_done += 1
-					self._flush_ordered()
 
-			# Final ordered flush
-			self._flush_ordered(force=True)
-			self._flush_xlsx()
+					if translations is not None:
+						translations.update(zip(texts, results))
+						done = f"{len(translations)}/{table.unique} distinct strings translated"
+					else:
+						results = translate_pair_batch(TableEngine(dict(zip(texts, results))), batch)
+						rows_done += len(results)
+						for r in results:
+							f_log.write(f"{datetime.now()},0,{r['index']},Procesado por worker {wid}\n")
+						# Hand off to the writer thread (orders and flushes)
+						self._writer.put([self._output_row(r) for r in results])
+						done = f"{self._writer.saved_rows} rows written to disk"
+
+					if batches_done % 5 == 0 or batches_done == total_batches:
+						of_total = f"/{total_batches}" if total_batches is not None else ""
+						size_now = f", batch size {sizer.size}" if sizer is not None else ""
+						print(
+							f"Progress: {batches_done}{of_total} batches done, {done}, "
+							f"writer queue {self._writer.depth}, "
+							f"reorder buffer {self._writer.buffered_rows} rows{size_now}"
+						)
+
+				# Top up the workers (also a replacement that just became ready)
+				fill_workers()
 
-			f_log.write(f"{datetime.now()},0,-,XLSX sincronizado\n")
+			# Every batch is accounted for: stop the workers
+			pool.stop()
+			while pool.live:
+				messages = pool.receive(timeout=10.0)
+				if not messages:
+					break
+				for msg_type, wid, payload in messages:
+					if wid not in pool.live:
+						continue
+					if msg_type == MSG_WORKER_METRICS:
+						self._worker_metrics[wid] = payload
+					elif msg_type == MSG_WORKER_DONE:
+						pool.retire(wid)
+					elif msg_type in (MSG_WORKER_ERROR, MSG_WORKER_EXIT):
+						pool.lose(wid)
+
+			if translations is not None and not stop_requested:
+				# Every distinct string is translated: rebuild the rows in order.
+				lookup = TableEngine(translations)
+				for batch in iter_batches(rows, pair_from_record, self.batch_size, start_index=self.skip_rows):
+					results = translate_pair_batch(lookup, batch)
+					rows_done += len(results)
+					self._writer.put([self._output_row(r) for r in results])
+				f_log.write(f"{datetime.now()},0,-,Filas reconstruidas: {rows_done}\n")
+
+			# Write the remaining ordered rows and stop the writer
+			self._writer.close()
+			self._dump_metrics(force=True)
+
+			f_log.write(f"{datetime.now()},0,-,Salida sincronizada\n")
 			f_log.write(f"{datetime.now()},0,-,Terminó\n")
 
 		except Exception as exc:
@@ -314,56 +638,69 @@ class MasterCoordinator:
 			raise
 		finally:
 			# Terminate workers
-			for p in workers:
-				if p.is_alive():
-					p.terminate()
-					p.join(timeout=3)
+			pool.terminate()
 
+			if self._writer is not None:
+				self._writer.abort()
+			if self._sink is not None:
+				self._sink.close()
 			f_log.close()
 			for signum, handler in previous_handlers.items():
 				signal.signal(signum, handler)
 
+		self.stats.writer_queue_max = self._writer.max_depth
+		self.stats.reorder_rows_max = self._writer.max_buffered_rows
+		self.stats.finish(self._writer.saved_rows)
+		status = "Stopped" if stop_requested else "Completed"
 		print(
-			f"Completed. Translated {total_rows} pairs -> {self.output_excel} "
-			f"({self._saved_rows} rows written to disk)"
+			f"{status}. Translated {rows_done} pairs -> {self._sink.path} "
+			f"({self._writer.saved_rows} rows written to disk)"
 		)
-
-	def _flush_ordered(self, force: bool = False) -> None:
-		"""Write results in order from the buffer to the XLSX sheet."""
-		while self._next_write_index in self._results_buffer:
-			r = self._results_buffer.pop(self._next_write_index)
-			self._sheet.append([
-				r['index'],
-				r['Q_original'],
-				r['A_original'],
-				r['Q_traducida'],
-				r['A_traducida'],
-			])
-			self._pending_rows += 1
-			self._next_write_index += 1
-
-		# Periodic XLSX flush to disk
-		if self._pending_rows > 0 and (
-			force
-			or self._pending_rows >= self.flush_every
-			or (time.monotonic() - self._last_flush_time >= self.flush_interval_seconds)
+		if stop_requested:
+			raise SystemExit(1)
+		if self.unordered and self.finalize:
+			self._finalize()
+		self._export_xlsx()
+		return self.stats
+
+	def _dump_metrics(self, force: bool = False) -> None:
+		"""Merge the workers' latest snapshots and write --metrics-file."""
+		if not self.metrics_file or not self._worker_metrics:
+			return
+		if not force and (
+			self.metrics_interval <= 0
+			or time.monotonic() - self._last_metrics_dump < self.metrics_interval
 		):
-			self._flush_xlsx()
-
-	def _flush_xlsx(self) -> None:
-		if self._pending_rows == 0:
 			return
-		self._output_path.parent.mkdir(parents=True, exist_ok=True)
-		try:
-			self._workbook.save(self._temp_path)
-			os.replace(self._temp_path, self._output_path)
-		except Exception:
-			if self._temp_path.exists():
-				self._temp_path.unlink()
-			raise
-		self._saved_rows += self._pending_rows
-		self._pending_rows = 0
-		self._last_flush_time = time.monotonic()
+		merged = EngineMetrics.merged(self._worker_metrics.values())
+		write_metrics(merged, self.metrics_file, self.metrics_format)
+		self._last_metrics_dump = time.monotonic()
+
+	@staticmethod
+	def _output_row(r: Dict[str, Any]) -> List[Any]:
+		"""A worker result as an output row (XLSX_HEADERS order)."""
+		return [
+			r['index'],
+			r['Q_original'],
+			r['A_original'],
+			r['Q_traducida'],
+			r['A_traducida'],
+		]
+
+	def _finalize(self) -> None:
+		"""Sort the finished unordered output by index (--finalize)."""
+		t0 = time.perf_counter()
+		written = finalize_sorted(self._sink.path, self.XLSX_HEADERS, self._sink.format)
+		print(f"Sorted {written} rows of {self._sink.path} by index ({time.perf_counter() - t0:.1f}s)")
+
+	def _export_xlsx(self) -> None:
+		"""Export the finished JSONL/Parquet output to --output-excel."""
+		if not self.xlsx_export or self._sink.format == "xlsx":
+			return
+		t0 = time.perf_counter()
+		exported = export_xlsx(self._sink.path, self.output_excel, self.XLSX_HEADERS, self._sink.format)
+		note = " in write order (--finalize sorts by index)" if self.unordered and not self.finalize else ""
+		print(f"Exported {exported} rows to {self.output_excel}{note} ({time.perf_counter() - t0:.1f}s)")
 
 
 # ---------------------------------------------------------------------------
@@ -377,142 +714,307 @@ def translate_pairs_single(skip_rows: int,
 						   flush_every: int = 5,
 						   flush_interval_seconds: float = 5.0,
 						   dataset_name: str = "embedding-data/PAQ_pairs",
-						   resume_append: bool = False) -> None:
-	"""Single-process mode with in-order buffered writing."""
+						   resume_append: bool = False,
+						   batch_size: int = 20,
+						   metrics_file: Optional[str] = None,
+						   metrics_format: str = "json",
+						   metrics_interval: float = 60.0,
+						   streaming: bool = False,
+						   output_format: str = "jsonl",
+						   output_path: Optional[str] = None,
+						   xlsx_export: bool = True,
+						   global_dedup: bool = False) -> PipelineStats:
+	"""Single-process mode with in-order buffered writing.
+
+	Rows are grouped into batches of *batch_size* and each batch is translated
+	with one flattened, de-duplicated engine call. With *global_dedup* the
+	distinct strings of the whole row range are translated first, most
+	frequent first, and the batches are then served from that table.
+	"""
+	run_stats = PipelineStats()
 	configure_cache(Path.cwd())
 	engine = make_engine(**engine_config)
-	dataset = load_dataset(dataset_name, streaming=False, split="train")
+	dataset = load_source_dataset(dataset_name, streaming=streaming)
 
-	output_path = Path(output_excel)
-	temp_path = output_path.with_name(f"{output_path.stem}.tmp{output_path.suffix}")
-	headers = ['index', 'Q_original', 'A_original', 'Q_traducida', 'A_traducida']
-	workbook, sheet = load_or_create_workbook(
-		output_path, headers, resume_append=resume_append
+	sink = open_sink(
+		resolve_output_path(output_excel, output_path, output_format),
+		output_format, MasterCoordinator.XLSX_HEADERS, resume_append=resume_append,
 	)
 
 	# Buffer for reordering
 	buffer: Dict[int, dict] = {}
 	next_write_index = skip_rows
-	pending_rows = 0
+	# Indices of failed rows, left out of the output
+	skipped: Set[int] = set()
 	saved_rows = 0
 	last_flush_time = time.monotonic()
+	last_metrics_dump = time.monotonic()
 
-	def flush_xlsx():
-		nonlocal pending_rows, saved_rows, last_flush_time
-		if pending_rows == 0:
+	def dump_metrics(force=False):
+		nonlocal last_metrics_dump
+		if not metrics_file or engine.metrics is None:
 			return
-		output_path.parent.mkdir(parents=True, exist_ok=True)
-		try:
-			workbook.save(temp_path)
-			os.replace(temp_path, output_path)
-		except Exception:
-			if temp_path.exists():
-				temp_path.unlink()
-			raise
-		saved_rows += pending_rows
-		pending_rows = 0
+		if not force and (
+			metrics_interval <= 0
+			or time.monotonic() - last_metrics_dump < metrics_interval
+		):
+			return
+		write_metrics(engine.metrics, metrics_file, metrics_format)
+		last_metrics_dump = time.monotonic()
+
+	def flush_output(force=False):
+		nonlocal saved_rows, last_flush_time
+		t0 = time.perf_counter()
+		written = sink.flush(force=force)
+		if not written:
+			return
+		saved_rows += written
 		last_flush_time = time.monotonic()
+		run_stats.add_flush(time.perf_counter() - t0)
 
 	def flush_ordered(force=False):
-		nonlocal next_write_index, pending_rows
-		while next_write_index in buffer:
+		nonlocal next_write_index
+		while next_write_index in buffer or next_write_index in skipped:
+			if next_write_index in skipped:
+				skipped.discard(next_write_index)
+				next_write_index += 1
+				continue
 			row = buffer.pop(next_write_index)
-			sheet.append([
+			sink.append([
 				next_write_index,
 				row['Q_original'],
 				row['A_original'],
 				row['Q_traducida'],
 				row['A_traducida'],
 			])
-			pending_rows += 1
 			next_write_index += 1
-		if pending_rows > 0 and (
+		if sink.pending_rows > 0 and (
 			force
-			or pending_rows >= flush_every
+			or sink.pending_rows >= flush_every
 			or (time.monotonic() - last_flush_time >= flush_interval_seconds)
 		):
-			flush_xlsx()
+			flush_output()
 
 	processed = 0
 	last_index = None
 	stop_requested = False
+	pending: List[Tuple[int, str, str]] = []
 	f_log = open(log_file, 'w', encoding='utf-8', buffering=1)
+
+	# Engine the rows are translated with (a TableEngine with --global-dedup)
+	row_engine = engine
+
+	def skip_rows_at(indices: List[int]) -> None:
+		"""Leave failed rows out so the rows after them are still written."""
+		skipped.update(i for i in indices if i >= next_write_index and i not in buffer)
+		flush_ordered()
+
+	def process_pending() -> bool:
+		"""Translate the pending batch. Returns False if the run must stop."""
+		nonlocal processed
+		if not pending:
+			return True
+		start_time = datetime.now()
+		item = f"{pending[0][0]}-{pending[-1][0]}"
+		if isinstance(row_engine, TableEngine):
+			# --global-dedup: drop only the rows using a string that could not
+			# be translated (see pretranslate).
+			known = row_engine.translations
+			failed = [row[0] for row in pending if not all(t is None or t in known for t in pair_texts([row]))]
+			if failed:
+				f_log.write(f"{datetime.now()},0,{item},Filas omitidas (cadenas sin traducir): {len(failed)}\n")
+				print(f"Skipping {len(failed)} rows of {item}: strings without translation")
+				skip_rows_at(failed)
+				dropped = set(failed)
+				pending[:] = [row for row in pending if row[0] not in dropped]
+				if not pending:
+					return True
+		try:
+			f_log.write(f"{datetime.now()},{datetime.now()-start_time},{item},A procesar\n")
+			t0 = time.perf_counter()
+			results = translate_pair_batch(row_engine, pending)
+			if row_engine is engine:
+				run_stats.add_batch(time.perf_counter() - t0)
+			f_log.write(f"{datetime.now()},{datetime.now()-start_time},{item},Procesado\n")
+			for r in results:
+				buffer[r['index']] = r
+			flush_ordered()
+			dump_metrics()
+			f_log.write(f"{datetime.now()},{datetime.now()-start_time},{item},Encolado para guardado\n")
+			prev = processed
+			processed += len(results)
+			if processed // 50 != prev // 50:
+				print(
+					f"Processed {processed} rows (dataset index {pending[-1][0]}, flushed {saved_rows} rows to disk)"
+				)
+		except RetryExhaustedError as e:
+			# Retries exhausted on this batch: stop the pipeline cleanly.
+			f_log.write(
+				f"{datetime.now()},{datetime.now()-start_time},{item},"
+				f"RetryExhausted: {e}\n"
+			)
+			print(f"Fatal at rows {item}: retries exhausted: {e}")
+			return False
+		except Exception as e:
+			f_log.write(f"{datetime.now()},{datetime.now()-start_time},{item},Error: {e}\n")
+			print(f"Error at rows {item}: {e}; skipping them")
+			skip_rows_at([row[0] for row in pending])
+		finally:
+			pending.clear()
+		return True
+
+	def pretranslate(rows) -> Optional[Dict[str, str]]:
+		"""Translate the distinct strings of *rows*, most frequent first.
+
+		Returns None if the run must stop.
+		"""
+		table = build_string_table(rows, pair_text_columns)
+		run_stats.dedup_ratio = table.dedup_ratio
+		print(f"Global dedup: {table.describe()}")
+		translations: Dict[str, str] = {}
+		chunk_size = batch_size * max(1, round(table.strings_per_row()))
+
+		def translate_chunk(chunk: List[str]) -> bool:
+			"""Add the translations of *chunk*; False if it failed (not fatal)."""
+			try:
+				t0 = time.perf_counter()
+				translations.update(zip(chunk, translate_unique(engine, chunk)))
+				run_stats.add_batch(time.perf_counter() - t0)
+				return True
+			except RetryExhaustedError:
+				raise
+			except Exception as e:
+				f_log.write(f"{datetime.now()},0,-,Error: {e}\n")
+				print(f"Error while translating {len(chunk)} distinct strings: {e}")
+				return False
+
+		failed: List[List[str]] = []
+		try:
+			for chunk in iter_batches(table.strings, lambda _index, text: text, chunk_size):
+				before = len(translations)
+				if not translate_chunk(chunk):
+					failed.append(chunk)
+				dump_metrics()
+				if len(translations) // 1000 != before // 1000 or len(translations) == table.unique:
+					print(f"Translated {len(translations)}/{table.unique} distinct strings")
+			# Failed chunks get one more attempt. Strings that still fail stay
+			# out of the table and only the rows using them are skipped.
+			for chunk in failed:
+				print(f"Retrying {len(chunk)} distinct strings")
+				translate_chunk(chunk)
+		except RetryExhaustedError as e:
+			f_log.write(f"{datetime.now()},0,-,RetryExhausted: {e}\n")
+			print(f"Fatal while translating distinct strings: retries exhausted: {e}")
+			return None
+		return translations
+
 	try:
 		f_log.write("time,delta,item,event\n")
-		for i, data in enumerate(dataset):
-			last_index = i
-			if i < skip_rows:
-				continue
-			if max_rows is not None and processed >= max_rows:
-				break
-			start_time = datetime.now()
-			try:
-				Q_original = data["set"][0]
-				A_original = data["set"][1]
-				f_log.write(f"{datetime.now()},{datetime.now()-start_time},{i},A procesar\n")
-				Q_traducida, A_traducida = engine.translate([Q_original, A_original])
-				d = {
-					"Q_original": Q_original,
-					"A_original": A_original,
-					"Q_traducida": Q_traducida,
-					"A_traducida": A_traducida
-				}
-				f_log.write(f"{datetime.now()},{datetime.now()-start_time},{i},Procesado\n")
-				buffer[i] = d
-				flush_ordered()
-				f_log.write(f"{datetime.now()},{datetime.now()-start_time},{i},Encolado para guardado\n")
-				processed += 1
-				if processed % 50 == 0:
-					print(
-						f"Processed {processed} rows (dataset index {i}, flushed {saved_rows} rows to disk)"
-					)
-			except RetryExhaustedError as e:
-				# Retries exhausted on this item: stop the pipeline cleanly.
-				f_log.write(
-					f"{datetime.now()},{datetime.now()-start_time},{i},"
-					f"RetryExhausted: {e}\n"
-				)
-				print(f"Fatal at index {i}: retries exhausted: {e}")
+		# select_rows jumps straight to skip_rows instead of scanning to it.
+		rows = select_rows(dataset, skip_rows, max_rows)
+		if global_dedup:
+			translations = pretranslate(rows)
+			if translations is None:
+				stop_requested = True
+			else:
+				row_engine = TableEngine(translations)
+		batches = () if stop_requested else iter_batches(
+			rows, pair_from_record, batch_size, start_index=skip_rows
+		)
+		for batch in batches:
+			pending.extend(batch)
+			last_index = batch[-1][0]
+			if not process_pending():
 				stop_requested = True
 				break
-			except Exception as e:
-				f_log.write(f"{datetime.now()},{datetime.now()-start_time},{i},Error: {e}\n")
-				print(f"Error at index {i}: {e}")
 	finally:
 		final_item = last_index if last_index is not None else -1
 		try:
 			flush_ordered(force=True)
-			flush_xlsx()
+			flush_output(force=True)
 		except Exception as exc:
-			f_log.write(f"{datetime.now()},0,{final_item},Error al sincronizar XLSX: {exc}\n")
+			f_log.write(f"{datetime.now()},0,{final_item},Error al sincronizar la salida: {exc}\n")
 			raise
 		else:
-			f_log.write(f"{datetime.now()},0,{final_item},XLSX sincronizado\n")
+			f_log.write(f"{datetime.now()},0,{final_item},Salida sincronizada\n")
 		finally:
+			sink.close()
 			f_log.write(f"{datetime.now()},0,{final_item},Terminó\n")
 			f_log.close()
+	dump_metrics(force=True)
+	run_stats.finish(processed)
 	status = "stopped" if stop_requested else "Completed"
 	print(
-		f"{status}. Translated {processed} pairs -> {output_excel} "
+		f"{status}. Translated {processed} pairs -> {sink.path} "
 		f"(flushed {saved_rows} rows to disk)"
 	)
+	stats = engine.stats()
+	if stats:
+		print(f"Engine stats: {stats}")
 	if stop_requested:
 		raise SystemExit(1)
+	if xlsx_export and sink.format != "xlsx":
+		t0 = time.perf_counter()
+		exported = export_xlsx(sink.path, output_excel, MasterCoordinator.XLSX_HEADERS, sink.format)
+		print(f"Exported {exported} rows to {output_excel} ({time.perf_counter() - t0:.1f}s)")
+	return run_stats
 
 
 def build_arg_parser():
 	p = argparse.ArgumentParser(description="Translate PAQ question-answer pairs to Spanish.")
 	p.add_argument('--skip-rows', type=int, default=0, help='Number of initial rows to skip (resume)')
 	p.add_argument('--max-rows', type=int, default=None, help='Limit rows to translate (debug)')
-	p.add_argument('--output-excel', default='dataset_paq_traducido.xlsx', help='Output Excel file path')
+	p.add_argument('--output-excel', default='dataset_paq_traducido.xlsx',
+				   help='XLSX file exported at the end of the run (the working file with --output-format xlsx)')
+	p.add_argument('--output-format', choices=OUTPUT_FORMATS, default='jsonl',
+				   help='Working output format: append-only jsonl (fsync per flush), parquet '
+				   '(directory of shards of >= 1000 rows) or xlsx (whole workbook saved per flush) (default: jsonl)')
+	p.add_argument('--output', default=None,
+				   help='Working output path (default: --output-excel with the .jsonl/.parquet suffix)')
+	p.add_argument('--no-xlsx-export', dest='xlsx_export', action='store_false',
+				   help='Do not export --output-excel at the end of a jsonl/parquet run')
 	p.add_argument('--log-file', default='log.txt', help='Log file path')
-	p.add_argument('--flush-every', type=int, default=5, help='Queue this many translated rows before forcing an XLSX flush')
-	p.add_argument('--flush-interval-seconds', type=float, default=5.0, help='Maximum seconds between XLSX flushes')
-	p.add_argument('--dataset', default='embedding-data/PAQ_pairs', help='Source dataset name')
+	p.add_argument('--flush-every', type=int, default=5, help='Queue this many translated rows before forcing an output flush')
+	p.add_argument('--flush-interval-seconds', type=float, default=5.0, help='Maximum seconds between output flushes')
+	p.add_argument('--dataset', default='embedding-data/PAQ_pairs',
+				   help='Source dataset: HuggingFace Hub name or local .jsonl/.json/.parquet file')
+	p.add_argument('--streaming', action='store_true',
+				   help='Read the dataset as a stream instead of downloading/preparing it first')
 	p.add_argument('--workers', type=int, default=1,
 				   help='Number of worker processes (master-slave mode when > 1)')
+	p.add_argument('--threads-per-worker', type=parse_threads_per_worker, default=None,
+				   help="With --workers > 1, torch/OpenMP threads per worker, or 'auto' to split the "
+				   'available cores evenly (default: let every worker use all cores)')
+	p.add_argument('--pin-workers', action='store_true',
+				   help='With --workers > 1, pin each worker to its own disjoint set of cores '
+				   '(implies --threads-per-worker auto unless given)')
+	p.add_argument('--share-weights', action='store_true',
+				   help='With --workers > 1, load the transformers model once in the master and '
+				   'share its weights with every worker (CPU, fp32/bf16 only)')
 	p.add_argument('--batch-size', type=int, default=20,
-				   help='Rows per batch sent to each worker (default: 20)')
+				   help='Rows per batch; each batch is translated with one flattened, '
+				   'de-duplicated engine call and, with --workers > 1, sent to one worker (default: 20)')
+	p.add_argument('--target-batch-seconds', type=float, default=0.0,
+				   help='With --workers > 1, adapt the batch size so each batch takes about this many '
+				   'seconds of worker time, starting from --batch-size and kept within '
+				   '[1, 8 x --batch-size] (default: 0 = fixed --batch-size)')
+	p.add_argument('--global-dedup', action='store_true',
+				   help='Count the distinct strings of the selected rows first (needs a map-style '
+				   'dataset, not --streaming), translate each once, most frequent first, and '
+				   'rebuild the rows from them')
+	p.add_argument('--reorder-window', type=int, default=0,
+				   help='With --workers > 1, stop dispatching new batches while they would start this '
+				   'many rows past the oldest unfinished batch; bounds the rows held for reordering '
+				   '(default: 0 = 8 x --workers x the current batch size; an idle worker always gets a batch)')
+	p.add_argument('--unordered', action='store_true',
+				   help='With --workers > 1, write each batch as soon as it is translated instead of in '
+				   'dataset order (jsonl/parquet only); a resumed run translates only the index '
+				   'ranges missing from the output')
+	p.add_argument('--finalize', action='store_true',
+				   help='With --unordered, sort the output by index once the run completes')
+	p.add_argument('--max-worker-restarts', type=int, default=3,
+				   help='With --workers > 1, replace a worker that crashes or dies at most this many '
+				   'times per run; its batch is always re-queued (default: 3)')
 	p.add_argument(
 		'--temp-guard-max', type=int, default=80,
 		help='Kill the GPU worker when it reaches this temp (C) so VRAM is '
@@ -556,7 +1058,9 @@ def _run_as_supervisor_or_worker(args, parser) -> bool:
 	# the supervisor manage kill/restart.
 	resume_append = os.environ.get("TRANSLATE_SUPERVISOR_CHILD") == "1"
 	skip_rows = args.skip_rows
-	if resume_append:
+	# An unordered output resumes from its missing index ranges instead
+	# (MasterCoordinator), so the range always starts at --skip-rows.
+	if resume_append and not args.unordered:
 		env_skip = os.environ.get("TRANSLATE_SKIP_ROWS")
 		if env_skip is not None:
 			skip_rows = int(env_skip)
@@ -575,7 +1079,11 @@ def _run_as_supervisor_or_worker(args, parser) -> bool:
 		rc = run_temp_guard_supervisor(
 			script_path=os.path.abspath(__file__),
 			argv=sys.argv[1:],
-			output_xlsx=args.output_excel,
+			output_path=str(resolve_output_path(args.output_excel, args.output, args.output_format)),
+			read_last_index_fn=(
+				(lambda _path: None) if args.unordered
+				else lambda path: read_last_index(path, args.output_format)
+			),
 			initial_skip_rows=args.skip_rows,
 			temp_max=args.temp_guard_max,
 			temp_resume=args.temp_guard_resume,
@@ -597,6 +1105,15 @@ def _run_as_supervisor_or_worker(args, parser) -> bool:
 			flush_interval_seconds=args.flush_interval_seconds,
 			dataset_name=args.dataset,
 			resume_append=resume_append,
+			batch_size=args.batch_size,
+			metrics_file=args.metrics_file,
+			metrics_format=args.metrics_format,
+			metrics_interval=args.metrics_interval,
+			streaming=args.streaming,
+			output_format=args.output_format,
+			output_path=args.output,
+			xlsx_export=args.xlsx_export,
+			global_dedup=args.global_dedup,
 		)
 	else:
 		mp.freeze_support()
@@ -612,6 +1129,22 @@ def _run_as_supervisor_or_worker(args, parser) -> bool:
 			flush_interval_seconds=args.flush_interval_seconds,
 			dataset_name=args.dataset,
 			resume_append=resume_append,
+			metrics_file=args.metrics_file,
+			metrics_format=args.metrics_format,
+			metrics_interval=args.metrics_interval,
+			streaming=args.streaming,
+			output_format=args.output_format,
+			output_path=args.output,
+			xlsx_export=args.xlsx_export,
+			target_batch_seconds=args.target_batch_seconds,
+			max_worker_restarts=args.max_worker_restarts,
+			global_dedup=args.global_dedup,
+			reorder_window=args.reorder_window,
+			unordered=args.unordered,
+			finalize=args.finalize,
+			share_weights=args.share_weights,
+			threads_per_worker=args.threads_per_worker,
+			pin_workers=args.pin_workers,
 		)
 		coordinator.run()
 	return True
@@ -625,6 +1158,22 @@ def main():
 		parser.error("--workers must be >= 1")
 	if args.batch_size <= 0:
 		parser.error("--batch-size must be >= 1")
+	if args.target_batch_seconds < 0:
+		parser.error("--target-batch-seconds must be >= 0")
+	if args.max_worker_restarts < 0:
+		parser.error("--max-worker-restarts must be >= 0")
+	if args.reorder_window < 0:
+		parser.error("--reorder-window must be >= 0")
+	if args.global_dedup and args.streaming:
+		parser.error("--global-dedup cannot be used with --streaming")
+	if args.unordered and args.workers == 1:
+		parser.error("--unordered requires --workers > 1 (a single process writes in order)")
+	if args.unordered and args.output_format == "xlsx":
+		parser.error("--unordered requires --output-format jsonl or parquet")
+	if args.unordered and args.global_dedup:
+		parser.error("--unordered cannot be used with --global-dedup (it writes the rows in order at the end)")
+	if args.finalize and not args.unordered:
+		parser.error("--finalize requires --unordered")
 	if args.nretries <= 0:
 		parser.error("--nretries must be >= 1")
 
@@ -644,6 +1193,15 @@ def main():
 			flush_every=args.flush_every,
 			flush_interval_seconds=args.flush_interval_seconds,
 			dataset_name=args.dataset,
+			batch_size=args.batch_size,
+			metrics_file=args.metrics_file,
+			metrics_format=args.metrics_format,
+			metrics_interval=args.metrics_interval,
+			streaming=args.streaming,
+			output_format=args.output_format,
+			output_path=args.output,
+			xlsx_export=args.xlsx_export,
+			global_dedup=args.global_dedup,
 		)
 	else:
 		mp.freeze_support()
@@ -658,6 +1216,22 @@ def main():
 			flush_every=args.flush_every,
 			flush_interval_seconds=args.flush_interval_seconds,
 			dataset_name=args.dataset,
+			metrics_file=args.metrics_file,
+			metrics_format=args.metrics_format,
+			metrics_interval=args.metrics_interval,
+			streaming=args.streaming,
+			output_format=args.output_format,
+			output_path=args.output,
+			xlsx_export=args.xlsx_export,
+			target_batch_seconds=args.target_batch_seconds,
+			max_worker_restarts=args.max_worker_restarts,
+			global_dedup=args.global_dedup,
+			reorder_window=args.reorder_window,
+			unordered=args.unordered,
+			finalize=args.finalize,
+			share_weights=args.share_weights,
+			threads_per_worker=args.threads_per_worker,
+			pin_workers=args.pin_workers,
 		)
 		coordinator.run()
 
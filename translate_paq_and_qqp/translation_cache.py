@@ -0,0 +1,186 @@
+"""Persistent, content-addressed translation cache.
+
+:class:`CachedEngine` wraps any :class:`~translation_engine.TranslationEngine`
+and stores every translation in a local SQLite database keyed by
+``sha256(engine identity + source text)``. The engine identity (see
+:meth:`TranslationEngine.cache_identity`) includes the backend name, model and
+generation settings, so changing any of them never returns stale results.
+
+Re-running ``translate_qqp.py`` / ``translate_paq.py`` over an overlapping row
+range (after a crash, a supervisor restart or a config tweak) therefore only
+sends the strings that were never translated before through the model.
+
+SQLite is used in WAL mode with a busy timeout: every ``MasterCoordinator``
+worker process opens its own connection to the same file, readers never block
+each other, and concurrent writers simply wait for the lock.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from translation_engine import TranslationEngine
+
+
+# SQLite limits the number of bound parameters per statement (999 on old
+# builds), so lookups are chunked.
+_SQL_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+	key TEXT PRIMARY KEY,
+	translation TEXT NOT NULL,
+	size INTEGER NOT NULL,
+	last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used);
+"""
+
+
+class CachedEngine(TranslationEngine):
+	"""Disk-backed cache in front of another :class:`TranslationEngine`.
+
+	Cache hits skip the inner engine entirely; all misses of one
+	:meth:`translate` call are de-duplicated and sent to the inner engine as a
+	single batch. When the live size of the database exceeds *max_bytes*, the
+	least recently used entries are evicted.
+	"""
+
+	def __init__(
+		self,
+		inner: TranslationEngine,
+		path: str,
+		max_bytes: Optional[int] = 1024 * 1024 * 1024,
+		timeout: float = 60.0,
+	):
+		self.inner = inner
+		self.name = f"cached-{inner.name}"
+		self.path = Path(path)
+		self.max_bytes = max_bytes
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+		identity = json.dumps(inner.cache_identity(), sort_keys=True)
+		self._namespace = hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		self._conn = sqlite3.connect(str(self.path), timeout=timeout)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.execute("PRAGMA synchronous=NORMAL")
+		with self._conn:
+			self._conn.executescript(_SCHEMA)
+
+	def cache_identity(self) -> Dict[str, Any]:
+		return self.inner.cache_identity()
+
+	def _key(self, text: str) -> str:
+		h = hashlib.sha256(self._namespace.encode("ascii"))
+		h.update(b"\0")
+		h.update(text.encode("utf-8"))
+		return h.hexdigest()
+
+	def _lookup(self, keys: List[str]) -> Dict[str, str]:
+		found: Dict[str, str] = {}
+		for start in range(0, len(keys), _SQL_CHUNK):
+			chunk = keys[start:start + _SQL_CHUNK]
+			placeholders = ",".join("?" * len(chunk))
+			rows = self._conn.execute(
+				f"SELECT key, translation FROM translations WHERE key IN ({placeholders})",
+				chunk,
+			).fetchall()
+			found.update(rows)
+		return found
+
+	def _live_bytes(self) -> int:
+		page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+		page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+		free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+		return (page_count - free_pages) * page_size
+
+	def _evict_if_needed(self) -> None:
+		if not self.max_bytes:
+			return
+		while self._live_bytes() > self.max_bytes:
+			total = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+			if total == 0:
+				return
+			# Drop the oldest ~10% per round so eviction amortises well.
+			n = max(1, total // 10)
+			with self._conn:
+				cur = self._conn.execute(
+					"DELETE FROM translations WHERE key IN ("
+					"SELECT key FROM translations ORDER BY last_used LIMIT ?)",
+					(n,),
+				)
+			self.evictions += cur.rowcount
+
+	def translate(self, texts: List[str]) -> List[str]:
+		if not texts:
+			return []
+		keys = [self._key(t) for t in texts]
+		found = self._lookup(list(dict.fromkeys(keys)))
+		now = time.time()
+
+		# De-duplicated misses, in first-seen order.
+		missing: Dict[str, str] = {}
+		hits = 0
+		for key, text in zip(keys, texts):
+			if key in found:
+				hits += 1
+			else:
+				missing.setdefault(key, text)
+		self.hits += hits
+		self.misses += len(texts) - hits
+		self._metric_inc("cache_hits_total", hits)
+		self._metric_inc("cache_misses_total", len(texts) - hits)
+
+		if missing:
+			translated = self.inner.translate(list(missing.values()))
+			fresh = dict(zip(missing.keys(), translated))
+			found.update(fresh)
+			# An empty output for a non-empty source is a dead-lettered item
+			# (--on-failure bisect): return it, but never cache it.
+			fresh = {
+				k: v for (k, v), src in zip(fresh.items(), missing.values())
+				if v or not src.strip()
+			}
+			with self._conn:
+				self._conn.executemany(
+					"INSERT OR REPLACE INTO translations (key, translation, size, last_used) "
+					"VALUES (?, ?, ?, ?)",
+					[
+						(k, v, len(v.encode("utf-8")) + len(k), now)
+						for k, v in fresh.items()
+					],
+				)
+			self._evict_if_needed()
+
+		hit_keys = [k for k in dict.fromkeys(keys) if k not in missing]
+		if hit_keys:
+			with self._conn:
+				self._conn.executemany(
+					"UPDATE translations SET last_used = ? WHERE key = ?",
+					[(now, k) for k in hit_keys],
+				)
+
+		return [found[k] for k in keys]
+
+	def stats(self) -> Dict[str, Any]:
+		lookups = self.hits + self.misses
+		out = dict(self.inner.stats())
+		out.update({
+			"cache_hits": self.hits,
+			"cache_misses": self.misses,
+			"cache_hit_ratio": (self.hits / lookups) if lookups else 0.0,
+			"cache_evictions": self.evictions,
+		})
+		return out
+
+	def close(self) -> None:
+		self._conn.close()
@@ -1,21 +1,44 @@
 """Translation engine abstraction with retry/timeout support.
 
-Two backends are exposed through the single :func:`make_engine` factory:
+Four backends are exposed through the single :func:`make_engine` factory:
 
 * ``transformers`` - HuggingFace ``AutoModelForSeq2SeqLM`` (e.g.
   ``Helsinki-NLP/opus-mt-en-es``). Runs in-process on CPU/CUDA.
+* ``ct2`` - the same opus-mt model converted once to CTranslate2 (int8 by
+  default) and cached on disk. Several times faster than PyTorch on CPU.
 * ``ollama`` - a local Ollama server (e.g. with ``translategemma:latest``
-  pulled). One HTTP request is issued per text.
+  pulled). One HTTP request is issued per text; with ``ollama_concurrency``
+  > 1 the :class:`AsyncOllamaEngine` keeps that many requests in flight.
+* ``stub`` - no model at all: deterministic fake output with configurable
+  latency, jitter and failure rate (:class:`StubEngine`), for profiling the
+  pipeline itself.
 
-``torch`` / ``transformers`` are imported lazily inside
-``TransformersEngine.__init__`` so that Ollama-only users do not need them
-installed (and therefore do not need to download the large CUDA wheels).
+``routing`` combines two of them (:class:`RoutingEngine`): short, plain
+strings go to a fast engine and long or awkward ones to a larger one.
+
+``torch`` / ``transformers`` / ``ctranslate2`` are imported lazily inside the
+engine constructors so that Ollama-only users do not need them installed (and
+therefore do not need to download the large CUDA wheels).
+
+Passing ``cache_path`` to :func:`make_engine` wraps any backend in the
+persistent SQLite cache from :mod:`translation_cache`; ``metrics=True``
+attaches the counters and histograms from :mod:`engine_metrics`.
 """
 
 from __future__ import annotations
 
+import argparse
+import asyncio
+import json
+import os
+import re
+import shutil
 import time
-from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
 
 
 # ---------------------------------------------------------------------------
@@ -57,6 +80,11 @@ class RetryExhaustedError(RuntimeError):
 		self.attempts = attempts
 		self.last_exc = last_exc
 
+	def __reduce__(self):
+		# Rebuild from the constructor arguments when unpickled: workers send
+		# this exception to the master through their pipe.
+		return (self.__class__, (self.attempts, self.last_exc))
+
 
 # ---------------------------------------------------------------------------
 # Engine interface
@@ -65,16 +93,130 @@ class TranslationEngine:
 	"""Maps a list of source strings to a list of translated strings."""
 
 	name: str = "base"
+	# Preferred number of strings per ``translate`` call; see
+	# :func:`translate_unique`.
+	batch_size: int = 32
+	# Shared :class:`engine_metrics.EngineMetrics`, or None when disabled.
+	metrics: Any = None
 
 	def translate(self, texts: List[str]) -> List[str]:  # pragma: no cover - abstract
 		raise NotImplementedError
 
+	def cache_identity(self) -> Dict[str, Any]:
+		"""Everything that influences the output besides the source text.
+
+		Used by :class:`translation_cache.CachedEngine` to namespace cache keys.
+		"""
+		return {"engine": self.name}
+
+	def stats(self) -> Dict[str, Any]:
+		"""Counters accumulated so far (printed by the scripts at the end)."""
+		return {}
+
+	def _metric_inc(self, name: str, value: float = 1) -> None:
+		if self.metrics is not None:
+			self.metrics.inc(name, value)
+
+	def _metric_observe(self, name: str, value: float) -> None:
+		if self.metrics is not None:
+			self.metrics.observe(name, value)
+
+
+FAILURE_MODES = ("abort", "bisect")
+
 
 class _RetryMixin:
-	"""Mixin providing ``_call_with_retry`` with exponential backoff."""
+	"""Mixin providing ``_call_with_retry`` with exponential backoff.
+
+	With ``on_failure = "bisect"`` a failing batch is split in half
+	recursively (see :meth:`_run_isolated`), so the healthy items are still
+	translated in large batches and only the poisoned ones go through the
+	per-item retry loop. Items that exhaust their retries are appended to
+	``dead_letter_path`` (JSON lines) and translated as ``""`` instead of
+	raising :class:`RetryExhaustedError`.
+	"""
 
 	nretries: int = 1
 	_retry_base_delay: float = 1.0
+	on_failure: str = "abort"
+	dead_letter_path: Optional[str] = None
+	dead_letters: int = 0
+
+	def stats(self) -> Dict[str, Any]:
+		out = super().stats()  # type: ignore[misc]
+		if self.on_failure == "bisect":
+			out["dead_letters"] = self.dead_letters
+		return out
+
+	def _dead_letter(self, text: str, exc: BaseException) -> str:
+		"""Record *text* as untranslatable and return its placeholder output."""
+		self.dead_letters += 1
+		self._metric_inc("dead_letters_total")  # type: ignore[attr-defined]
+		print(f"[engine:{type(self).__name__}] dead-lettered 1 item: {exc!r}")
+		if self.dead_letter_path:
+			record = {
+				"time": datetime.now().isoformat(),
+				"engine": self.name,  # type: ignore[attr-defined]
+				"text": text,
+				"error": repr(exc),
+			}
+			# One write() per line in append mode, so several worker processes
+			# can share the file without interleaving records.
+			with open(self.dead_letter_path, "a", encoding="utf-8") as fh:
+				fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+		return ""
+
+	def _run_isolated(
+		self,
+		fn: Callable[[List[Any]], List[str]],
+		items: List[Any],
+		text_of: Callable[[Any], str] = str,
+	) -> List[str]:
+		"""Run ``fn(items)`` honouring :attr:`on_failure`.
+
+		``abort`` retries the whole batch and lets :class:`RetryExhaustedError`
+		propagate. ``bisect`` tries the batch once, splits it in half on
+		failure and recurses; a single failing item gets the full retry loop
+		and is dead-lettered if it still fails. *text_of* maps an item back to
+		its source text for the dead-letter record.
+		"""
+		if self.on_failure != "bisect":
+			return self._call_with_retry(fn, items)
+		if len(items) == 1:
+			try:
+				return self._call_with_retry(fn, items)
+			except RetryExhaustedError as exc:
+				return [self._dead_letter(text_of(items[0]), exc.last_exc or exc)]
+		try:
+			return fn(items)
+		except Exception as exc:  # noqa: BLE001 - intentional broad catch
+			mid = len(items) // 2
+			print(
+				f"[engine:{type(self).__name__}] batch of {len(items)} failed: "
+				f"{exc!r}; bisecting into {mid} + {len(items) - mid}"
+			)
+			return (
+				self._run_isolated(fn, items[:mid], text_of)
+				+ self._run_isolated(fn, items[mid:], text_of)
+			)
+
+	def _retry_delay(self, attempt: int, exc: BaseException) -> Optional[float]:
+		"""Log a failed attempt; return the backoff delay, or None to give up."""
+		self._metric_inc("failed_attempts_total")  # type: ignore[attr-defined]
+		remaining = self.nretries - attempt - 1
+		if remaining > 0:
+			delay = self._retry_base_delay * (2 ** attempt)
+			print(
+				f"[engine:{type(self).__name__}] attempt {attempt + 1}/{self.nretries} "
+				f"failed: {exc!r}; retrying in {delay:.1f}s ({remaining} left)"
+			)
+			self._metric_inc("retries_total")  # type: ignore[attr-defined]
+			return delay
+		print(
+			f"[engine:{type(self).__name__}] attempt {attempt + 1}/{self.nretries} "
+			f"failed: {exc!r}; giving up"
+		)
+		return None
 
 	def _call_with_retry(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
 		last_exc: Optional[BaseException] = None
@@ -83,27 +225,85 @@ class _RetryMixin:
 				return fn(*args, **kwargs)
 			except Exception as exc:  # noqa: BLE001 - intentional broad catch
 				last_exc = exc
-				remaining = self.nretries - attempt - 1
-				if remaining > 0:
-					delay = self._retry_base_delay * (2 ** attempt)
-					print(
-						f"[engine:{type(self).__name__}] attempt {attempt + 1}/{self.nretries} "
-						f"failed: {exc!r}; retrying in {delay:.1f}s ({remaining} left)"
-					)
+				delay = self._retry_delay(attempt, exc)
+				if delay is not None:
 					time.sleep(delay)
-				else:
-					print(
-						f"[engine:{type(self).__name__}] attempt {attempt + 1}/{self.nretries} "
-						f"failed: {exc!r}; giving up"
-					)
+		raise RetryExhaustedError(self.nretries, last_exc)
+
+	async def _acall_with_retry(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+		"""Async twin of :meth:`_call_with_retry`.
+
+		The backoff uses ``asyncio.sleep`` so a retrying request never blocks
+		the other requests running on the same event loop.
+		"""
+		last_exc: Optional[BaseException] = None
+		for attempt in range(self.nretries):
+			try:
+				return await fn()
+			except Exception as exc:  # noqa: BLE001 - intentional broad catch
+				last_exc = exc
+				delay = self._retry_delay(attempt, exc)
+				if delay is not None:
+					await asyncio.sleep(delay)
 		raise RetryExhaustedError(self.nretries, last_exc)
 
 
 # ---------------------------------------------------------------------------
 # Transformers backend
 # ---------------------------------------------------------------------------
+# Whitespace after sentence-final punctuation (optionally followed by closing
+# quotes/brackets); used to segment inputs longer than the model limit.
+_SENTENCE_BOUNDARY = re.compile(r"""(?<=[.!?])\s+|(?<=[.!?]["')\]])\s+""")
+
+# fp32: stock weights. bf16: weights cast to bfloat16 (CPU with AVX512-BF16/AMX
+# or recent GPUs). int8-dynamic: torch dynamic quantization of every Linear
+# layer (CPU only); smaller per-worker RSS and faster CPU batches.
+PRECISIONS = ("fp32", "bf16", "int8-dynamic")
+
+
+class SharedWeights:
+	"""Tokenizer + model loaded once and handed to ``spawn`` workers.
+
+	The model parameters are moved to shared memory (``share_memory()``).
+	Pickling this handle into a worker process (torch registers its own
+	reducers for tensors) passes the shared segments instead of copying the
+	data, so N workers attach to a single copy of the weights. Workers only
+	run inference, so they never write to them.
+	"""
+
+	def __init__(self, model_name: str, precision: str, tokenizer: Any, model: Any):
+		self.model_name = model_name
+		self.precision = precision
+		self.tokenizer = tokenizer
+		self.model = model
+
+
+def load_shared_weights(
+	model_name: str = "Helsinki-NLP/opus-mt-en-es",
+	device: Optional[str] = None,
+	precision: str = "fp32",
+) -> SharedWeights:
+	"""Load *model_name* into shared memory (CPU only) for :class:`TransformersEngine`."""
+	import torch
+
+	if precision == "int8-dynamic":
+		# Dynamically quantized Linear layers keep their weights in packed
+		# params that are re-packed (copied) on unpickling.
+		raise ValueError("--share-weights does not support --precision int8-dynamic.")
+	if TransformersEngine._resolve_device(device, torch) != "cpu":
+		raise ValueError("--share-weights is only supported with --device cpu.")
+	tokenizer, model = TransformersEngine._load_model(model_name, precision, torch)
+	model.eval()
+	model.share_memory()
+	return SharedWeights(model_name, precision, tokenizer, model)
+
+
 class TransformersEngine(_RetryMixin, TranslationEngine):
-	"""HuggingFace Seq2Seq engine (opus-mt style models)."""
+	"""HuggingFace Seq2Seq engine (opus-mt style models).
+
+	With *shared_weights* (see :func:`load_shared_weights`) the tokenizer and
+	model come from that handle instead of being loaded from disk.
+	"""
 
 	name = "transformers"
 
@@ -113,12 +313,28 @@ class TransformersEngine(_RetryMixin, TranslationEngine):
 		device: Optional[str] = None,
 		timeout: float = 300.0,
 		nretries: int = 3,
+		max_batch_tokens: Optional[int] = None,
+		precision: str = "fp32",
+		segment_long_inputs: bool = True,
+		max_input_tokens: Optional[int] = None,
+		shared_weights: Optional[SharedWeights] = None,
 		**_unused: Any,
 	):
 		# Lazy imports: keep torch/transformers out of the import graph for
-		# Ollama-only users.
+		# Ollama-only users. The model classes are imported before the RSS
+		# baseline (transformers loads its modeling code only on this symbol
+		# import), so rss_delta_mb measures the model load, not the imports.
 		import torch
-		from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+		from transformers import AutoModelForSeq2SeqLM, AutoTokenizer  # noqa: F401
+
+		from proc_stats import rss_mb
+
+		if precision not in PRECISIONS:
+			raise ValueError(
+				f"Invalid precision '{precision}'. Use one of: {', '.join(PRECISIONS)}."
+			)
+		rss_before = rss_mb()
+		load_start = time.perf_counter()
 
 		self.torch = torch
 		self._model_name = model_name
@@ -127,12 +343,102 @@ class TransformersEngine(_RetryMixin, TranslationEngine):
 		self.timeout = timeout
 		self.nretries = max(1, int(nretries))
 		self.device = self._resolve_device(device, torch)
+		# Token budget per generate() call (padded batch size x longest input).
+		# None keeps the historical "one padded batch per translate()" mode.
+		self.max_batch_tokens = int(max_batch_tokens) if max_batch_tokens else None
+		self.real_tokens = 0
+		self.padded_tokens = 0
 
-		self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-		self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-		self.model.to(self.device)
+		self.precision = precision
+		if precision == "int8-dynamic" and not self.device.startswith("cpu"):
+			raise ValueError("--precision int8-dynamic is only supported on CPU.")
+
+		self.shared = shared_weights is not None
+		if shared_weights is not None:
+			if (shared_weights.model_name, shared_weights.precision) != (model_name, precision):
+				raise ValueError(
+					f"Shared weights are {shared_weights.model_name} ({shared_weights.precision}), "
+					f"but the engine was configured for {model_name} ({precision})."
+				)
+			if self.device != "cpu":
+				raise ValueError("Shared weights can only be used with --device cpu.")
+			self.tokenizer, self.model = shared_weights.tokenizer, shared_weights.model
+		else:
+			self.tokenizer, self.model = self._load_model(model_name, precision, torch)
+			self.model.to(self.device)
 		self.model.eval()
 
+		# Inputs longer than this (in tokens, including special tokens) are
+		# split on sentence boundaries instead of being truncated.
+		self.segment_long_inputs = segment_long_inputs
+		self.max_input_tokens = int(max_input_tokens or self._model_input_limit())
+		self.split_inputs = 0
+		self.segments_created = 0
+
+		self.load_stats = self._measure_startup(rss_before, load_start)
+		print(
+			f"[engine:{self.name}] precision={precision} shared={self.shared} "
+			f"load={self.load_stats['load_seconds']:.1f}s "
+			f"rss_delta={self.load_stats['rss_delta_mb']} MB "
+			f"warmup={self.load_stats['warmup_sentences_per_sec']} sent/s"
+		)
+
+	@staticmethod
+	def _load_model(model_name: str, precision: str, torch) -> Tuple[Any, Any]:
+		from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+		tokenizer = AutoTokenizer.from_pretrained(model_name)
+		model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+		if precision == "bf16":
+			model = model.to(torch.bfloat16)
+		elif precision == "int8-dynamic":
+			model = torch.ao.quantization.quantize_dynamic(
+				model, {torch.nn.Linear}, dtype=torch.qint8
+			)
+		return tokenizer, model
+
+	def _measure_startup(self, rss_before: Optional[float], load_start: float) -> Dict[str, Any]:
+		"""Load time, RSS delta and a short warmup throughput probe."""
+		from proc_stats import rss_mb
+
+		load_seconds = time.perf_counter() - load_start
+		rss_after = rss_mb()
+		probe = [
+			"How do I improve my English speaking skills?",
+			"Who wrote the novel One Hundred Years of Solitude?",
+			"the United States Congress",
+			"1998",
+		]
+		t0 = time.perf_counter()
+		self.translate(probe)
+		warmup_seconds = time.perf_counter() - t0
+		# The probe should not show up in the run's statistics.
+		self.real_tokens = 0
+		self.padded_tokens = 0
+		self.split_inputs = 0
+		self.segments_created = 0
+		return {
+			"precision": self.precision,
+			"load_seconds": round(load_seconds, 3),
+			"rss_delta_mb": (
+				round(rss_after - rss_before, 1)
+				if rss_before is not None and rss_after is not None
+				else None
+			),
+			"warmup_sentences_per_sec": (
+				round(len(probe) / warmup_seconds, 2) if warmup_seconds > 0 else None
+			),
+		}
+
+	def _model_input_limit(self) -> int:
+		limits = [
+			self.tokenizer.model_max_length,
+			getattr(self.model.config, "max_position_embeddings", None),
+		]
+		# Tokenizers without a limit report a huge sentinel (int(1e30)).
+		limits = [n for n in limits if isinstance(n, int) and 0 < n < 1_000_000]
+		return min(limits) if limits else 512
+
 	@staticmethod
 	def _resolve_device(device: Optional[str], torch) -> str:
 		if device is None:
@@ -149,19 +455,294 @@ class TransformersEngine(_RetryMixin, TranslationEngine):
 			)
 		return resolved
 
+	def cache_identity(self) -> Dict[str, Any]:
+		return {
+			"engine": self.name,
+			"model": self._model_name,
+			"precision": self.precision,
+			"max_input_tokens": self.max_input_tokens if self.segment_long_inputs else None,
+		}
+
+	@property
+	def padding_ratio(self) -> float:
+		"""Share of the encoder input that was padding, over every call so far."""
+		if self.padded_tokens == 0:
+			return 0.0
+		return 1.0 - self.real_tokens / self.padded_tokens
+
+	def stats(self) -> Dict[str, Any]:
+		out = super().stats()
+		out.update({
+			"real_tokens": self.real_tokens,
+			"padded_tokens": self.padded_tokens,
+			"padding_ratio": round(self.padding_ratio, 4),
+			"split_inputs": self.split_inputs,
+			"segments_created": self.segments_created,
+		})
+		return out
+
+	def _count_tokens(self, text: str) -> int:
+		return len(self.tokenizer(text)["input_ids"])
+
+	def _pack(self, units: List[str], limit: int) -> List[str]:
+		"""Greedily join *units* with spaces into chunks of <= *limit* tokens.
+
+		A unit that is too long on its own is returned as its own chunk (the
+		caller decides whether to split it further).
+		"""
+		chunks: List[str] = []
+		current = ""
+		for unit in units:
+			candidate = f"{current} {unit}" if current else unit
+			if current and self._count_tokens(candidate) > limit:
+				chunks.append(current)
+				current = unit
+			else:
+				current = candidate
+		if current:
+			chunks.append(current)
+		return chunks
+
+	def _segment(self, text: str) -> List[str]:
+		"""Split an over-long *text* into chunks under ``max_input_tokens``.
+
+		Sentence boundaries first; a single sentence that is still too long
+		is split between words. Token counts are exact (same tokenizer).
+		"""
+		limit = self.max_input_tokens
+		segments: List[str] = []
+		for chunk in self._pack(_SENTENCE_BOUNDARY.split(text.strip()), limit):
+			if self._count_tokens(chunk) <= limit:
+				segments.append(chunk)
+			else:
+				segments.extend(self._pack(chunk.split(), limit))
+		return segments
+
+	def _generate(self, encoded) -> List[str]:
+		"""Run ``generate`` on an already padded batch and decode it."""
+		mask = encoded["attention_mask"]
+		real, padded = int(mask.sum()), int(mask.numel())
+		self.real_tokens += real
+		self.padded_tokens += padded
+		encoded = {k: v.to(self.device) for k, v in encoded.items()}
+		tokens = self.model.generate(**encoded)
+		if self.metrics is not None:
+			self.metrics.inc("real_tokens_total", real)
+			self.metrics.inc("padded_tokens_total", padded)
+			self.metrics.inc("input_tokens_total", real)
+			pad_id = self.tokenizer.pad_token_id
+			generated = int((tokens != pad_id).sum()) if pad_id is not None else int(tokens.numel())
+			self.metrics.inc("output_tokens_total", generated)
+		return self.tokenizer.batch_decode(tokens, skip_special_tokens=True)
+
+	def _token_budget_batches(self, lengths: List[int]) -> List[List[int]]:
+		"""Group input positions into length-sorted sub-batches.
+
+		Inputs are sorted by token length and greedily packed while
+		``len(sub_batch) * longest_member`` stays within ``max_batch_tokens``.
+		An input longer than the budget on its own gets a sub-batch of one.
+		"""
+		order = sorted(range(len(lengths)), key=lengths.__getitem__)
+		batches: List[List[int]] = []
+		current: List[int] = []
+		for pos in order:
+			# Sorted ascending, so the newcomer is the longest member.
+			if current and (len(current) + 1) * lengths[pos] > self.max_batch_tokens:
+				batches.append(current)
+				current = []
+			current.append(pos)
+		if current:
+			batches.append(current)
+		return batches
+
 	def translate(self, texts: List[str]) -> List[str]:
+		if not texts:
+			return []
+		if not self.segment_long_inputs:
+			return self._translate_batch(texts)
+
+		lengths = [len(ids) for ids in self.tokenizer(texts)["input_ids"]]
+		if max(lengths) <= self.max_input_tokens:
+			return self._translate_batch(texts)
+
+		# Replace every over-long input by its segments, translate them in the
+		# same batch as the short inputs, then stitch them back per item.
+		pieces: List[str] = []
+		spans: List[Tuple[int, int]] = []
+		for text, n_tokens in zip(texts, lengths):
+			parts = self._segment(text) if n_tokens > self.max_input_tokens else [text]
+			if len(parts) > 1:
+				self.split_inputs += 1
+				self.segments_created += len(parts)
+				self._metric_inc("split_inputs_total")
+			spans.append((len(pieces), len(pieces) + len(parts)))
+			pieces.extend(parts)
+		translated = self._translate_batch(pieces)
+		return [" ".join(t for t in translated[a:b] if t) for a, b in spans]
+
+	def _translate_batch(self, texts: List[str]) -> List[str]:
 		tokenizer = self.tokenizer
-		model = self.model
-		device = self.device
+		if not self.max_batch_tokens:
+			def _do(batch: List[str]) -> List[str]:
+				encoded = tokenizer(batch, return_tensors="pt", padding=True, truncation=True)
+				return self._generate(encoded)
+
+			with self.torch.inference_mode():
+				return self._run_isolated(_do, texts)
 
-		def _do() -> List[str]:
-			encoded = tokenizer(texts, return_tensors="pt", padding=True, truncation=True)
-			encoded = {k: v.to(device) for k, v in encoded.items()}
-			tokens = model.generate(**encoded)
-			return tokenizer.batch_decode(tokens, skip_special_tokens=True)
+		# Token-budget mode: tokenize once, then pad each length bucket
+		# separately so short strings never pay for long neighbours.
+		input_ids = tokenizer(texts, truncation=True)["input_ids"]
+		lengths = [len(ids) for ids in input_ids]
 
+		def _do_positions(positions: List[int]) -> List[str]:
+			features = [{"input_ids": input_ids[p]} for p in positions]
+			encoded = tokenizer.pad(features, padding=True, return_tensors="pt")
+			return self._generate(encoded)
+
+		out: List[Optional[str]] = [None] * len(texts)
 		with self.torch.inference_mode():
-			return self._call_with_retry(_do)
+			for positions in self._token_budget_batches(lengths):
+				translated = self._run_isolated(_do_positions, positions, texts.__getitem__)
+				for p, t in zip(positions, translated):
+					out[p] = t
+		return out  # type: ignore[return-value]
+
+
+# ---------------------------------------------------------------------------
+# CTranslate2 backend
+# ---------------------------------------------------------------------------
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+	"""Hold an exclusive inter-process lock on *path* (``flock``; no-op without fcntl)."""
+	try:
+		import fcntl
+	except ImportError:
+		yield
+		return
+	with open(path, "a") as fh:
+		fcntl.flock(fh, fcntl.LOCK_EX)
+		try:
+			yield
+		finally:
+			fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+class CTranslate2Engine(_RetryMixin, TranslationEngine):
+	"""opus-mt model running on the CTranslate2 runtime.
+
+	On first use the HuggingFace checkpoint is converted (and quantized to
+	*compute_type*) into ``<cache_dir>/<model>-<compute_type>``; later runs
+	load the converted artifact directly. Tokenization still uses the
+	HuggingFace tokenizer, so inputs and outputs match
+	:class:`TransformersEngine`.
+	"""
+
+	name = "ct2"
+
+	def __init__(
+		self,
+		model_name: str = "Helsinki-NLP/opus-mt-en-es",
+		device: Optional[str] = None,
+		timeout: float = 300.0,
+		nretries: int = 3,
+		compute_type: str = "int8",
+		beam_size: int = 4,
+		max_batch_tokens: Optional[int] = None,
+		cache_dir: Optional[str] = None,
+		**_unused: Any,
+	):
+		import ctranslate2  # lazy
+		from transformers import AutoTokenizer
+
+		self._model_name = model_name
+		self.timeout = timeout
+		self.nretries = max(1, int(nretries))
+		self.compute_type = compute_type
+		self.beam_size = max(1, int(beam_size))
+		self.max_batch_tokens = int(max_batch_tokens) if max_batch_tokens else None
+
+		# "cuda:1" -> ("cuda", 1); anything else runs on the CPU.
+		ct2_device, _, index = (device or "cpu").partition(":")
+		if ct2_device not in ("cpu", "cuda"):
+			raise ValueError(
+				f"Invalid device '{device}'. Use values like 'cpu', 'cuda', or 'cuda:0'."
+			)
+
+		base = Path(cache_dir or os.environ.get("HF_HOME", ".cache")) / "ct2"
+		self.model_dir = base / f"{model_name.replace('/', '--')}-{compute_type}"
+		self._ensure_converted(ctranslate2, model_name, self.model_dir, compute_type)
+
+		self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+		self.translator = ctranslate2.Translator(
+			str(self.model_dir),
+			device=ct2_device,
+			device_index=int(index or 0),
+			compute_type=compute_type,
+		)
+
+	@staticmethod
+	def _ensure_converted(ctranslate2, model_name: str, model_dir: Path, quantization: str) -> None:
+		"""Convert *model_name* into *model_dir* unless it is already there.
+
+		With ``--workers N`` every worker gets here at once on the first run:
+		they serialise on ``<model_dir>.lock`` and only the first converts.
+		The conversion goes to a per-process temp dir renamed into place, so a
+		half-written model is never visible.
+		"""
+		if (model_dir / "model.bin").exists():
+			return
+		model_dir.parent.mkdir(parents=True, exist_ok=True)
+		with _file_lock(model_dir.with_name(f"{model_dir.name}.lock")):
+			if (model_dir / "model.bin").exists():
+				return  # converted by another process while we waited
+			print(f"[engine:ct2] converting {model_name} -> {model_dir} ({quantization})")
+			tmp_dir = model_dir.with_name(f"{model_dir.name}.tmp-{os.getpid()}")
+			converter = ctranslate2.converters.TransformersConverter(model_name)
+			converter.convert(str(tmp_dir), quantization=quantization, force=True)
+			try:
+				os.replace(tmp_dir, model_dir)
+			except OSError:
+				# Without fcntl another process may have won the race.
+				if not (model_dir / "model.bin").exists():
+					raise
+				shutil.rmtree(tmp_dir, ignore_errors=True)
+
+	def cache_identity(self) -> Dict[str, Any]:
+		return {
+			"engine": self.name,
+			"model": self._model_name,
+			"compute_type": self.compute_type,
+			"beam_size": self.beam_size,
+		}
+
+	def translate(self, texts: List[str]) -> List[str]:
+		if not texts:
+			return []
+		tokenizer = self.tokenizer
+		sources = [tokenizer.convert_ids_to_tokens(tokenizer.encode(t)) for t in texts]
+		if self.max_batch_tokens:
+			batching = {"max_batch_size": self.max_batch_tokens, "batch_type": "tokens"}
+		else:
+			batching = {"max_batch_size": len(sources), "batch_type": "examples"}
+
+		def _do(positions: List[int]) -> List[str]:
+			batch = [sources[p] for p in positions]
+			results = self.translator.translate_batch(
+				batch, beam_size=self.beam_size, **batching
+			)
+			if self.metrics is not None:
+				self.metrics.inc("input_tokens_total", sum(len(b) for b in batch))
+				self.metrics.inc("output_tokens_total", sum(len(r.hypotheses[0]) for r in results))
+			return [
+				tokenizer.decode(
+					tokenizer.convert_tokens_to_ids(r.hypotheses[0]),
+					skip_special_tokens=True,
+				)
+				for r in results
+			]
+
+		return self._run_isolated(_do, list(range(len(texts))), texts.__getitem__)
 
 
 # ---------------------------------------------------------------------------
@@ -188,29 +769,345 @@ class OllamaEngine(_RetryMixin, TranslationEngine):
 		self.host = host
 		self.client = ollama.Client(host=host, timeout=timeout)
 
+	def cache_identity(self) -> Dict[str, Any]:
+		return {
+			"engine": self.name,
+			"model": self.model,
+			"options": {"temperature": 0},
+			"prompt": _OLLAMA_PROMPT_HEADER,
+		}
+
+	@staticmethod
+	def _response_field(resp: Any, field: str, default: Any) -> Any:
+		# Ollama's response object supports both dict-style and attribute access.
+		if isinstance(resp, dict):
+			return resp.get(field, default)
+		return getattr(resp, field, default)
+
+	def _response_text(self, resp: Any, http_seconds: float) -> str:
+		if self.metrics is not None:
+			self.metrics.observe("ollama_http_seconds", http_seconds)
+			self.metrics.inc("input_tokens_total", self._response_field(resp, "prompt_eval_count", 0) or 0)
+			self.metrics.inc("output_tokens_total", self._response_field(resp, "eval_count", 0) or 0)
+		content = self._response_field(resp, "response", "") or ""
+		return content.strip()
+
 	def _generate_one(self, text: str) -> str:
 		prompt = build_ollama_prompt(text)
 
 		def _do() -> str:
+			t0 = time.perf_counter()
 			resp = self.client.generate(
 				model=self.model,
 				prompt=prompt,
 				stream=False,
 				options={"temperature": 0},
 			)
-			# Ollama's response object supports both dict-style and attribute access.
-			if isinstance(resp, dict):
-				content = resp.get("response", "")
-			else:
-				content = getattr(resp, "response", "") or ""
-			return content.strip()
+			return self._response_text(resp, time.perf_counter() - t0)
 
-		return self._call_with_retry(_do)
+		try:
+			return self._call_with_retry(_do)
+		except RetryExhaustedError as exc:
+			# Requests are already per item, so there is nothing to bisect.
+			if self.on_failure != "bisect":
+				raise
+			return self._dead_letter(text, exc.last_exc or exc)
 
 	def translate(self, texts: List[str]) -> List[str]:
 		return [self._generate_one(t) for t in texts]
 
 
+class AsyncOllamaEngine(OllamaEngine):
+	"""Ollama engine that keeps up to *concurrency* requests in flight.
+
+	Each :meth:`translate` call runs an event loop with an
+	``ollama.AsyncClient``; a semaphore bounds the in-flight requests (match
+	it to the server's ``OLLAMA_NUM_PARALLEL``). Every request retries on its
+	own, and a request waiting out its backoff releases its slot. Output order
+	always matches input order.
+	"""
+
+	def __init__(
+		self,
+		model: str = "translategemma:latest",
+		host: str = "http://localhost:11434",
+		timeout: float = 300.0,
+		nretries: int = 3,
+		concurrency: int = 4,
+		**_unused: Any,
+	):
+		# No OllamaEngine.__init__: its sync client would never be used. The
+		# AsyncClient is created per translate() call.
+		import ollama  # noqa: F401 - lazy; fail at startup if it is missing
+
+		self.nretries = max(1, int(nretries))
+		self.timeout = timeout
+		self.model = model
+		self.host = host
+		self.concurrency = max(1, int(concurrency))
+
+	async def _agenerate_one(self, client, slots: asyncio.Semaphore, text: str) -> str:
+		prompt = build_ollama_prompt(text)
+
+		async def _do() -> str:
+			async with slots:
+				t0 = time.perf_counter()
+				resp = await client.generate(
+					model=self.model,
+					prompt=prompt,
+					stream=False,
+					options={"temperature": 0},
+				)
+				http_seconds = time.perf_counter() - t0
+			return self._response_text(resp, http_seconds)
+
+		try:
+			return await self._acall_with_retry(_do)
+		except RetryExhaustedError as exc:
+			if self.on_failure != "bisect":
+				raise
+			return self._dead_letter(text, exc.last_exc or exc)
+
+	async def _atranslate(self, texts: List[str]) -> List[str]:
+		import ollama  # lazy
+
+		# The client (and its connection pool) is bound to the running loop,
+		# so one is created per translate() call.
+		client = ollama.AsyncClient(host=self.host, timeout=self.timeout)
+		slots = asyncio.Semaphore(self.concurrency)
+		try:
+			return list(await asyncio.gather(
+				*(self._agenerate_one(client, slots, t) for t in texts)
+			))
+		finally:
+			await client.close()
+
+	def translate(self, texts: List[str]) -> List[str]:
+		if not texts:
+			return []
+		return asyncio.run(self._atranslate(texts))
+
+
+# ---------------------------------------------------------------------------
+# Stub backend (no model)
+# ---------------------------------------------------------------------------
+class StubEngine(_RetryMixin, TranslationEngine):
+	"""Deterministic fake backend for profiling the pipeline without a model.
+
+	Each text is "translated" to ``"[es] " + text``. Every call sleeps
+	``call_latency_ms + token_latency_ms x tokens`` (whitespace tokens),
+	scaled by a uniform ``1 +/- jitter`` factor, and fails with probability
+	*failure_rate* before returning. Latency and failures come from a
+	``random.Random(seed)``, so a run is reproducible per process. Retries and
+	``on_failure`` behave exactly as for the real backends.
+	"""
+
+	name = "stub"
+
+	def __init__(
+		self,
+		token_latency_ms: float = 0.0,
+		call_latency_ms: float = 0.0,
+		jitter: float = 0.0,
+		failure_rate: float = 0.0,
+		seed: int = 0,
+		timeout: float = 300.0,
+		nretries: int = 3,
+		**_unused: Any,
+	):
+		import random
+
+		if not 0.0 <= failure_rate <= 1.0:
+			raise ValueError(f"Invalid stub failure rate {failure_rate}; use a value in [0, 1].")
+		if not 0.0 <= jitter <= 1.0:
+			raise ValueError(f"Invalid stub jitter {jitter}; use a value in [0, 1].")
+		self.token_latency = max(0.0, token_latency_ms) / 1000.0
+		self.call_latency = max(0.0, call_latency_ms) / 1000.0
+		self.jitter = jitter
+		self.failure_rate = failure_rate
+		self.seed = seed
+		self.timeout = timeout
+		self.nretries = max(1, int(nretries))
+		self._rng = random.Random(seed)
+		self.calls = 0
+		self.failures = 0
+
+	def stats(self) -> Dict[str, Any]:
+		out = super().stats()
+		out.update({"stub_calls": self.calls, "stub_failures": self.failures})
+		return out
+
+	def _translate_batch(self, texts: List[str]) -> List[str]:
+		self.calls += 1
+		tokens = sum(len(t.split()) for t in texts)
+		delay = self.call_latency + self.token_latency * tokens
+		if self.jitter:
+			delay *= 1.0 + self._rng.uniform(-self.jitter, self.jitter)
+		if delay > 0:
+			time.sleep(delay)
+		if self.failure_rate and self._rng.random() < self.failure_rate:
+			self.failures += 1
+			raise RuntimeError(f"stub failure (batch of {len(texts)})")
+		out = [f"[es] {t}" if t.strip() else t for t in texts]
+		self._metric_inc("input_tokens_total", tokens)
+		self._metric_inc("output_tokens_total", tokens + sum(1 for t in texts if t.strip()))
+		return out
+
+	def translate(self, texts: List[str]) -> List[str]:
+		if not texts:
+			return []
+		return self._run_isolated(self._translate_batch, list(texts))
+
+
+# ---------------------------------------------------------------------------
+# Routing (composite) engine
+# ---------------------------------------------------------------------------
+class RoutingRule:
+	"""Send a text to engine *target* when every given condition holds.
+
+	* *min_tokens* / *max_tokens* - bounds on the token count (see
+	  ``RoutingEngine.count_tokens``);
+	* *min_symbol_ratio* - share of characters that are neither alphanumeric
+	  nor whitespace (punctuation, markup, ...; digits do not count);
+	* *pattern* - regular expression searched in the text.
+	"""
+
+	def __init__(
+		self,
+		target: str,
+		min_tokens: Optional[int] = None,
+		max_tokens: Optional[int] = None,
+		min_symbol_ratio: Optional[float] = None,
+		pattern: Optional[str] = None,
+	):
+		self.target = target
+		self.min_tokens = min_tokens
+		self.max_tokens = max_tokens
+		self.min_symbol_ratio = min_symbol_ratio
+		self.pattern = pattern
+		self._regex = re.compile(pattern) if pattern else None
+
+	def describe(self) -> Dict[str, Any]:
+		return {
+			"target": self.target,
+			"min_tokens": self.min_tokens,
+			"max_tokens": self.max_tokens,
+			"min_symbol_ratio": self.min_symbol_ratio,
+			"pattern": self.pattern,
+		}
+
+	def matches(self, text: str, count_tokens: Callable[[str], int]) -> bool:
+		if self.min_tokens is not None or self.max_tokens is not None:
+			n = count_tokens(text)
+			if self.min_tokens is not None and n < self.min_tokens:
+				return False
+			if self.max_tokens is not None and n > self.max_tokens:
+				return False
+		if self.min_symbol_ratio is not None:
+			if not text:
+				return False
+			symbols = sum(1 for ch in text if not (ch.isalnum() or ch.isspace()))
+			if symbols / len(text) < self.min_symbol_ratio:
+				return False
+		if self._regex is not None and not self._regex.search(text):
+			return False
+		return True
+
+
+class RoutingEngine(TranslationEngine):
+	"""Split each call across several engines by configurable rules.
+
+	Every text goes to the target of the first matching :class:`RoutingRule`
+	(or to *default*). The per-engine sub-lists are translated concurrently
+	in threads and merged back in input order. Retries, failure isolation and
+	caching stay the business of the wrapped engines / outer layers.
+	"""
+
+	name = "routing"
+
+	def __init__(
+		self,
+		engines: Dict[str, TranslationEngine],
+		rules: List[RoutingRule],
+		default: str,
+		count_tokens: Optional[Callable[[str], int]] = None,
+	):
+		for target in [r.target for r in rules] + [default]:
+			if target not in engines:
+				raise ValueError(f"Routing target '{target}' has no engine.")
+		self.engines = engines
+		self.rules = rules
+		self.default = default
+		self.count_tokens = count_tokens or (lambda text: len(text.split()))
+		self.routed: Dict[str, int] = {key: 0 for key in engines}
+
+	def cache_identity(self) -> Dict[str, Any]:
+		return {
+			"engine": self.name,
+			"engines": {k: e.cache_identity() for k, e in self.engines.items()},
+			"rules": [r.describe() for r in self.rules],
+			"default": self.default,
+		}
+
+	def stats(self) -> Dict[str, Any]:
+		out: Dict[str, Any] = {f"routed_{k}": n for k, n in self.routed.items()}
+		for key, engine in self.engines.items():
+			for stat, value in engine.stats().items():
+				out[f"{key}.{stat}"] = value
+		return out
+
+	def route(self, text: str) -> str:
+		for rule in self.rules:
+			if rule.matches(text, self.count_tokens):
+				return rule.target
+		return self.default
+
+	def translate(self, texts: List[str]) -> List[str]:
+		if not texts:
+			return []
+		groups: Dict[str, List[int]] = {}
+		for pos, text in enumerate(texts):
+			groups.setdefault(self.route(text), []).append(pos)
+		for key, positions in groups.items():
+			self.routed[key] += len(positions)
+			self._metric_inc(f"routed_{key}_total", len(positions))
+
+		def _run(key: str) -> List[str]:
+			return self.engines[key].translate([texts[p] for p in groups[key]])
+
+		out: List[Optional[str]] = [None] * len(texts)
+		if len(groups) == 1:
+			key = next(iter(groups))
+			results = {key: _run(key)}
+		else:
+			with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+				futures = {key: pool.submit(_run, key) for key in groups}
+				results = {key: f.result() for key, f in futures.items()}
+		for key, positions in groups.items():
+			for pos, translated in zip(positions, results[key]):
+				out[pos] = translated
+		return out  # type: ignore[return-value]
+
+
+# ---------------------------------------------------------------------------
+# Batch helper
+# ---------------------------------------------------------------------------
+def translate_unique(engine: TranslationEngine, texts: List[str]) -> List[str]:
+	"""Translate *texts* with as few engine calls as possible.
+
+	Duplicates are translated once, the unique strings are sent in chunks of
+	``engine.batch_size`` and the results are scattered back so the output
+	lines up with *texts*.
+	"""
+	unique = list(dict.fromkeys(texts))
+	chunk_size = max(1, int(engine.batch_size))
+	translated: Dict[str, str] = {}
+	for start in range(0, len(unique), chunk_size):
+		chunk = unique[start:start + chunk_size]
+		translated.update(zip(chunk, engine.translate(chunk)))
+	return [translated[t] for t in texts]
+
+
 # ---------------------------------------------------------------------------
 # Factory + argparse helper
 # ---------------------------------------------------------------------------
@@ -223,25 +1120,147 @@ def make_engine(
 	ollama_host: str = "http://localhost:11434",
 	timeout: float = 300.0,
 	nretries: int = 3,
+	cache_path: Optional[str] = None,
+	cache_max_mb: float = 1024.0,
+	batch_size: int = 32,
+	max_batch_tokens: Optional[int] = None,
+	ollama_concurrency: int = 1,
+	ct2_compute_type: str = "int8",
+	precision: str = "fp32",
+	on_failure: str = "abort",
+	dead_letter_path: Optional[str] = None,
+	metrics: bool = False,
+	segment_long_inputs: bool = True,
+	max_input_tokens: Optional[int] = None,
+	route_short_engine: str = "transformers",
+	route_long_engine: str = "ollama",
+	route_max_tokens: int = 64,
+	route_min_symbol_ratio: Optional[float] = None,
+	route_pattern: Optional[str] = None,
+	shared_weights: Optional[SharedWeights] = None,
+	stub_token_latency_ms: float = 0.0,
+	stub_call_latency_ms: float = 0.0,
+	stub_jitter: float = 0.0,
+	stub_failure_rate: float = 0.0,
+	stub_seed: int = 0,
 ) -> TranslationEngine:
-	"""Construct a :class:`TranslationEngine` by name."""
-	if engine == "transformers":
-		return TransformersEngine(
+	"""Construct a :class:`TranslationEngine` by name.
+
+	``engine="routing"`` builds *route_short_engine* and *route_long_engine*
+	with the same options and routes to the long one every text with more
+	than *route_max_tokens* tokens, a symbol ratio of at least
+	*route_min_symbol_ratio*, or a match of *route_pattern*.
+
+	*shared_weights* (from :func:`load_shared_weights`) makes
+	``transformers`` reuse an already loaded model instead of loading its own.
+
+	When *metrics* is true the backend is wrapped in an
+	:class:`engine_metrics.MeteredEngine` and every layer shares one
+	``EngineMetrics`` (reachable as ``engine.metrics``). When *cache_path* is
+	given the result is wrapped in a :class:`translation_cache.CachedEngine`
+	backed by that SQLite file.
+	"""
+	options = dict(locals())
+	base: TranslationEngine
+	if engine == "routing":
+		# Sub-engines get every option except the outer layers and routing.
+		sub_options = {
+			k: v for k, v in options.items()
+			if k not in ("engine", "cache_path", "metrics") and not k.startswith("route_")
+		}
+		if "routing" in (route_short_engine, route_long_engine):
+			raise ValueError("Routing sub-engines cannot themselves be 'routing'.")
+		short = make_engine(route_short_engine, **sub_options)
+		long = make_engine(route_long_engine, **sub_options)
+		rules = [RoutingRule("long", min_tokens=route_max_tokens + 1)]
+		if route_min_symbol_ratio is not None:
+			rules.append(RoutingRule("long", min_symbol_ratio=route_min_symbol_ratio))
+		if route_pattern:
+			rules.append(RoutingRule("long", pattern=route_pattern))
+		base = RoutingEngine(
+			{"short": short, "long": long},
+			rules,
+			default="short",
+			# Exact counts when the short engine has a HF tokenizer.
+			count_tokens=getattr(short, "_count_tokens", None),
+		)
+	elif engine == "transformers":
+		base = TransformersEngine(
 			model_name=model_name,
 			device=device,
 			timeout=timeout,
 			nretries=nretries,
+			max_batch_tokens=max_batch_tokens,
+			precision=precision,
+			segment_long_inputs=segment_long_inputs,
+			max_input_tokens=max_input_tokens,
+			shared_weights=shared_weights,
 		)
-	if engine == "ollama":
-		return OllamaEngine(
+	elif engine == "ct2":
+		base = CTranslate2Engine(
+			model_name=model_name,
+			device=device,
+			timeout=timeout,
+			nretries=nretries,
+			compute_type=ct2_compute_type,
+			max_batch_tokens=max_batch_tokens,
+		)
+	elif engine == "stub":
+		base = StubEngine(
+			token_latency_ms=stub_token_latency_ms,
+			call_latency_ms=stub_call_latency_ms,
+			jitter=stub_jitter,
+			failure_rate=stub_failure_rate,
+			seed=stub_seed,
+			timeout=timeout,
+			nretries=nretries,
+		)
+	elif engine == "ollama" and ollama_concurrency > 1:
+		base = AsyncOllamaEngine(
 			model=ollama_model,
 			host=ollama_host,
 			timeout=timeout,
 			nretries=nretries,
+			concurrency=ollama_concurrency,
 		)
-	raise ValueError(
-		f"Unknown engine '{engine}'. Use 'transformers' or 'ollama'."
-	)
+	elif engine == "ollama":
+		base = OllamaEngine(
+			model=ollama_model,
+			host=ollama_host,
+			timeout=timeout,
+			nretries=nretries,
+		)
+	else:
+		raise ValueError(
+			f"Unknown engine '{engine}'. Use 'transformers', 'ct2', 'ollama', 'stub' or 'routing'."
+		)
+	base.batch_size = batch_size
+	if isinstance(base, _RetryMixin):
+		if on_failure not in FAILURE_MODES:
+			raise ValueError(
+				f"Invalid on_failure '{on_failure}'. Use one of: {', '.join(FAILURE_MODES)}."
+			)
+		base.on_failure = on_failure
+		base.dead_letter_path = dead_letter_path
+
+	# Lazy imports below: both modules import this one.
+	result = base
+	if metrics:
+		from engine_metrics import EngineMetrics, MeteredEngine
+
+		base.metrics = EngineMetrics()
+		if isinstance(base, RoutingEngine):
+			for sub in base.engines.values():
+				sub.metrics = base.metrics
+		result = MeteredEngine(base, base.metrics)
+	if cache_path:
+		from translation_cache import CachedEngine
+
+		max_bytes = int(cache_max_mb * 1024 * 1024) if cache_max_mb > 0 else None
+		result = CachedEngine(result, cache_path, max_bytes=max_bytes)
+		result.metrics = base.metrics
+	result.batch_size = batch_size
+	return result
 
 
 def engine_config_from_args(args) -> Dict[str, Any]:
@@ -254,6 +1273,28 @@ def engine_config_from_args(args) -> Dict[str, Any]:
 		"ollama_host": args.ollama_host,
 		"timeout": args.timeout,
 		"nretries": args.nretries,
+		"cache_path": args.cache_db,
+		"cache_max_mb": args.cache_max_mb,
+		"batch_size": args.engine_batch_size,
+		"max_batch_tokens": args.max_batch_tokens,
+		"ollama_concurrency": args.ollama_concurrency,
+		"ct2_compute_type": args.ct2_compute_type,
+		"precision": args.precision,
+		"on_failure": args.on_failure,
+		"dead_letter_path": args.dead_letter_file,
+		"metrics": bool(args.metrics_file),
+		"segment_long_inputs": args.segment_long_inputs,
+		"max_input_tokens": args.max_input_tokens,
+		"route_short_engine": args.route_short_engine,
+		"route_long_engine": args.route_long_engine,
+		"route_max_tokens": args.route_max_tokens,
+		"route_min_symbol_ratio": args.route_min_symbol_ratio,
+		"route_pattern": args.route_pattern,
+		"stub_token_latency_ms": args.stub_token_latency_ms,
+		"stub_call_latency_ms": args.stub_call_latency_ms,
+		"stub_jitter": args.stub_jitter,
+		"stub_failure_rate": args.stub_failure_rate,
+		"stub_seed": args.stub_seed,
 	}
 
 
@@ -262,23 +1303,86 @@ def add_engine_args(parser) -> None:
 
 	Call this alongside the script-specific arguments. The ``--model`` and
 	``--device`` flags are also added here so behaviour is consistent across
-	scripts (``--model``/``--device`` only apply when ``--engine transformers``).
+	scripts (``--model``/``--device`` only apply to ``--engine transformers``/``ct2``).
 	"""
 	parser.add_argument(
 		"--engine",
-		choices=["transformers", "ollama"],
+		choices=["transformers", "ct2", "ollama", "stub", "routing"],
+		default="transformers",
+		help="Translation backend (default: transformers). 'routing' mixes "
+		"--route-short-engine and --route-long-engine by the --route-* rules; "
+		"'stub' is a model-free fake for profiling the pipeline (--stub-* flags)",
+	)
+	parser.add_argument(
+		"--route-short-engine",
+		choices=["transformers", "ct2", "ollama", "stub"],
 		default="transformers",
-		help="Translation backend (default: transformers)",
+		help="Engine for short/plain texts when --engine routing (default: transformers)",
+	)
+	parser.add_argument(
+		"--route-long-engine",
+		choices=["transformers", "ct2", "ollama", "stub"],
+		default="ollama",
+		help="Engine for long/awkward texts when --engine routing (default: ollama)",
+	)
+	parser.add_argument(
+		"--route-max-tokens",
+		type=int,
+		default=64,
+		help="Texts with more tokens than this go to the long engine (default: 64)",
+	)
+	parser.add_argument(
+		"--route-min-symbol-ratio",
+		type=float,
+		default=None,
+		help="Texts whose share of non-alphanumeric, non-space characters is at least "
+		"this go to the long engine (default: disabled)",
+	)
+	parser.add_argument(
+		"--route-pattern",
+		default=None,
+		help="Regular expression; matching texts go to the long engine (default: disabled)",
 	)
 	parser.add_argument(
 		"--model",
 		default="Helsinki-NLP/opus-mt-en-es",
-		help="HuggingFace model name (only used when --engine transformers)",
+		help="HuggingFace model name (only used when --engine transformers or ct2)",
 	)
 	parser.add_argument(
 		"--device",
 		default=None,
-		help="Device for inference, e.g. cpu, cuda, cuda:0 (only used when --engine transformers)",
+		help="Device for inference, e.g. cpu, cuda, cuda:0 (only used when --engine transformers or ct2)",
+	)
+	parser.add_argument(
+		"--precision",
+		choices=list(PRECISIONS),
+		default="fp32",
+		help="Model precision for --engine transformers: fp32, bf16 (weights cast "
+		"to bfloat16) or int8-dynamic (dynamic int8 quantization of Linear "
+		"layers, CPU only). Load time, RSS delta and warmup throughput are "
+		"printed at startup. Default: fp32",
+	)
+	parser.add_argument(
+		"--segment-long-inputs",
+		action=argparse.BooleanOptionalAction,
+		default=True,
+		help="For --engine transformers, split inputs longer than "
+		"--max-input-tokens on sentence boundaries (exact tokenizer counts), "
+		"translate the pieces together with the other inputs and stitch them "
+		"back, instead of silently truncating. Default: enabled",
+	)
+	parser.add_argument(
+		"--max-input-tokens",
+		type=int,
+		default=None,
+		help="Token limit used by --segment-long-inputs (default: the model's "
+		"maximum input length)",
+	)
+	parser.add_argument(
+		"--ct2-compute-type",
+		default="int8",
+		help="CTranslate2 quantization / compute type, e.g. int8, int8_float32, "
+		"float32, int8_float16 (only used when --engine ct2). Default: int8",
 	)
 	parser.add_argument(
 		"--ollama-model",
@@ -290,6 +1394,44 @@ def add_engine_args(parser) -> None:
 		default="http://localhost:11434",
 		help="Ollama server URL (only used when --engine ollama)",
 	)
+	parser.add_argument(
+		"--ollama-concurrency",
+		type=int,
+		default=1,
+		help="Requests kept in flight per process (only used when --engine "
+		"ollama). Match the server's OLLAMA_NUM_PARALLEL. Default: 1 (sequential)",
+	)
+	parser.add_argument(
+		"--stub-token-latency-ms",
+		type=float,
+		default=0.0,
+		help="Simulated latency per whitespace token for --engine stub (default: 0)",
+	)
+	parser.add_argument(
+		"--stub-call-latency-ms",
+		type=float,
+		default=0.0,
+		help="Simulated fixed latency per engine call for --engine stub (default: 0)",
+	)
+	parser.add_argument(
+		"--stub-jitter",
+		type=float,
+		default=0.0,
+		help="Random +/- fraction applied to the stub latency, e.g. 0.2 (default: 0)",
+	)
+	parser.add_argument(
+		"--stub-failure-rate",
+		type=float,
+		default=0.0,
+		help="Probability that a stub engine call raises (default: 0)",
+	)
+	parser.add_argument(
+		"--stub-seed",
+		type=int,
+		default=0,
+		help="Seed for the stub latency jitter and failures; with --workers > 1 "
+		"each worker adds its worker id (default: 0)",
+	)
 	parser.add_argument(
 		"--timeout",
 		type=float,
@@ -304,3 +1446,68 @@ def add_engine_args(parser) -> None:
 		help="Number of attempts per translation before giving up. "
 		"Exponential backoff between attempts. Default: 3",
 	)
+	parser.add_argument(
+		"--metrics-file",
+		default=None,
+		help="Write engine metrics (latency histograms, batch sizes, tokens/sec, "
+		"padding, HTTP latency, retries, cache hits) to this file. Workers' "
+		"metrics are merged by the master. Default: disabled",
+	)
+	parser.add_argument(
+		"--metrics-format",
+		choices=["json", "prometheus"],
+		default="json",
+		help="Format of --metrics-file (default: json)",
+	)
+	parser.add_argument(
+		"--metrics-interval",
+		type=float,
+		default=60.0,
+		help="Also rewrite --metrics-file every this many seconds during the run "
+		"(0 = only at the end). Default: 60",
+	)
+	parser.add_argument(
+		"--on-failure",
+		choices=list(FAILURE_MODES),
+		default="abort",
+		help="What to do when a batch still fails after --nretries attempts. "
+		"abort: stop the pipeline (RetryExhaustedError). bisect: split the "
+		"failing batch in half recursively, retry only the items that fail "
+		"alone, write them to --dead-letter-file and keep going. Default: abort",
+	)
+	parser.add_argument(
+		"--dead-letter-file",
+		default="dead_letters.jsonl",
+		help="JSON-lines file collecting untranslatable items when "
+		"--on-failure bisect (default: dead_letters.jsonl)",
+	)
+	parser.add_argument(
+		"--engine-batch-size",
+		type=int,
+		default=32,
+		help="Maximum unique strings per engine call. Each row batch is "
+		"flattened, de-duplicated and sent in chunks of this size. Default: 32",
+	)
+	parser.add_argument(
+		"--max-batch-tokens",
+		type=int,
+		default=None,
+		help="Token-budget batching for --engine transformers: inputs are sorted "
+		"by token length and packed into sub-batches of at most this many padded "
+		"tokens. Combine with a larger --engine-batch-size so there is more to "
+		"sort. Default: disabled (one padded batch per engine call)",
+	)
+	parser.add_argument(
+		"--cache-db",
+		default=None,
+		help="SQLite file for the persistent translation cache. Shared safely by "
+		"all worker processes; re-runs only translate strings not seen before. "
+		"Default: disabled",
+	)
+	parser.add_argument(
+		"--cache-max-mb",
+		type=float,
+		default=1024.0,
+		help="Evict least recently used cache entries above this size in MB "
+		"(0 = unbounded). Default: 1024",
+	)
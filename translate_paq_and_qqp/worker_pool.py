@@ -0,0 +1,216 @@
+"""Worker processes of ``MasterCoordinator``, each on its own pipe.
+
+Every worker gets a private duplex :func:`multiprocessing.Pipe` and the master
+waits on all pipes and process sentinels at once
+(:func:`multiprocessing.connection.wait`). No channel is shared between
+workers: a worker killed at any point (OOM killer, segfault, ``kill -9``)
+cannot leave a queue lock held or half a message in a pipe that the other
+workers still use, which is what makes it safe to carry on without it.
+
+On the worker side :func:`start_task_reader` drains the pipe on a thread, so
+the master can hand a busy worker its next batch (prefetch) without blocking
+on the send.
+
+:class:`WorkerPool` knows which batches it sent to which worker. When a
+worker dies or reports an error, :meth:`WorkerPool.lose` returns the batches
+it still held, for the coordinator to dispatch again, and
+:meth:`WorkerPool.replace` starts a replacement within the restart budget.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+# ---------------------------------------------------------------------------
+# Message type constants for inter-process communication
+# ---------------------------------------------------------------------------
+MSG_BATCH_RESULT = 'batch_result'
+MSG_WORKER_READY = 'worker_ready'
+MSG_WORKER_ERROR = 'worker_error'
+MSG_WORKER_DONE = 'worker_done'
+MSG_WORKER_METRICS = 'worker_metrics'
+# Not sent by workers: WorkerPool.receive reports a process that is gone
+MSG_WORKER_EXIT = 'worker_exit'
+
+
+def start_task_reader(conn) -> "queue.Queue[Any]":
+	"""Queue the tasks arriving on *conn*, read on a daemon thread (worker side).
+
+	``None`` is queued after the stop sentinel, or when the master's end of
+	the pipe is closed.
+	"""
+	tasks: "queue.Queue[Any]" = queue.Queue()
+
+	def read() -> None:
+		try:
+			while True:
+				task = conn.recv()
+				tasks.put(task)
+				if task is None:
+					return
+		except (EOFError, OSError):
+			tasks.put(None)
+
+	threading.Thread(target=read, name="task-reader", daemon=True).start()
+	return tasks
+
+
+class WorkerPool:
+	"""Start, feed and replace worker processes.
+
+	*target* is called in the child as ``target(worker_id, conn,
+	*worker_args(slot))``. Worker ids are never reused; a replacement gets a
+	new id and the *slot* (e.g. CPU layout) of the worker it replaces.
+	"""
+
+	def __init__(
+		self,
+		ctx,
+		target: Callable[..., Any],
+		worker_args: Callable[[int], Tuple[Any, ...]],
+		num_workers: int,
+		max_restarts: int = 0,
+	):
+		self.max_restarts = max_restarts
+		self.restarts = 0
+		# Batch ids sent to each live worker and not finished yet, oldest first
+		self.assigned: Dict[int, List[int]] = {}
+		self.ready: Set[int] = set()
+		self.starting: Set[int] = set()
+		self.processes: Dict[int, Any] = {}
+		self._ctx = ctx
+		self._target = target
+		self._worker_args = worker_args
+		self._conns: Dict[int, Any] = {}
+		self._slots: Dict[int, int] = {}
+		self._next_id = 0
+		for slot in range(num_workers):
+			self._spawn(slot)
+
+	@property
+	def live(self) -> Set[int]:
+		"""Workers that are starting or ready."""
+		return self.ready | self.starting
+
+	def pids(self) -> List[int]:
+		return [self.processes[wid].pid for wid in sorted(self.live)]
+
+	def _spawn(self, slot: int) -> int:
+		wid = self._next_id
+		self._next_id += 1
+		parent_conn, child_conn = self._ctx.Pipe()
+		p = self._ctx.Process(
+			target=self._target,
+			args=(wid, child_conn) + tuple(self._worker_args(slot)),
+			name=f'worker-{wid}',
+			daemon=True,
+		)
+		p.start()
+		# Only the child holds its end: EOF on ours means it is gone.
+		child_conn.close()
+		self.processes[wid] = p
+		self._conns[wid] = parent_conn
+		self._slots[wid] = slot
+		self.assigned[wid] = []
+		self.starting.add(wid)
+		return wid
+
+	def mark_ready(self, wid: int) -> None:
+		self.starting.discard(wid)
+		self.ready.add(wid)
+
+	def send(self, wid: int, batch_id: int, batch: Any) -> bool:
+		"""Send a batch to *wid*; False if its pipe is already broken."""
+		try:
+			self._conns[wid].send((batch_id, batch))
+		except OSError:
+			return False
+		self.assigned[wid].append(batch_id)
+		return True
+
+	def finished(self, wid: int, batch_id: int) -> None:
+		if batch_id in self.assigned.get(wid, ()):
+			self.assigned[wid].remove(batch_id)
+
+	def receive(self, timeout: Optional[float]) -> List[Tuple[str, int, Any]]:
+		"""Messages from live workers, waiting up to *timeout* for the first.
+
+		A worker whose process ended or whose pipe closed produces one
+		``(MSG_WORKER_EXIT, wid, exitcode)`` after whatever it sent before.
+		"""
+		handles: Dict[Any, int] = {}
+		for wid in self.live:
+			handles[self._conns[wid]] = wid
+			handles[self.processes[wid].sentinel] = wid
+		messages: List[Tuple[str, int, Any]] = []
+		gone: Set[int] = set()
+		for handle in wait(list(handles), timeout):
+			wid = handles[handle]
+			if wid in gone:
+				continue
+			if not self._drain(wid, messages) or handle is not self._conns[wid]:
+				gone.add(wid)
+		for wid in sorted(gone):
+			# Let the process finish exiting so the exit code is known.
+			self.processes[wid].join(timeout=1.0)
+			messages.append((MSG_WORKER_EXIT, wid, self.processes[wid].exitcode))
+		return messages
+
+	def _drain(self, wid: int, messages: List[Tuple[str, int, Any]]) -> bool:
+		"""Append what *wid* has sent; False once its pipe is closed."""
+		conn = self._conns[wid]
+		try:
+			while conn.poll():
+				messages.append(conn.recv())
+		except (EOFError, OSError):
+			return False
+		return True
+
+	def lose(self, wid: int) -> List[int]:
+		"""Drop *wid* (dead or failed); return the batch ids it still held."""
+		self.ready.discard(wid)
+		self.starting.discard(wid)
+		self._close(wid)
+		p = self.processes[wid]
+		if p.is_alive():
+			p.terminate()
+		p.join(timeout=5)
+		return self.assigned.pop(wid, [])
+
+	def replace(self, wid: int) -> Optional[int]:
+		"""Start a worker in *wid*'s slot, or None if the restart budget is used up."""
+		if self.restarts >= self.max_restarts:
+			return None
+		self.restarts += 1
+		return self._spawn(self._slots[wid])
+
+	def retire(self, wid: int) -> None:
+		"""Forget *wid* after it confirmed it is done."""
+		self.ready.discard(wid)
+		self.starting.discard(wid)
+		self.assigned.pop(wid, None)
+		self._close(wid)
+
+	def stop(self) -> None:
+		"""Send the stop sentinel to every live worker."""
+		for wid in sorted(self.live):
+			try:
+				self._conns[wid].send(None)
+			except OSError:
+				pass
+
+	def terminate(self) -> None:
+		for wid, p in self.processes.items():
+			if p.is_alive():
+				p.terminate()
+				p.join(timeout=3)
+			self._close(wid)
+
+	def _close(self, wid: int) -> None:
+		conn = self._conns.pop(wid, None)
+		if conn is not None:
+			conn.close()